@@ -3,89 +3,45 @@ import re
 import json
 import os
 
-def analyze_cards(text):
+from card_lexer import collect_sections, section_text, split_cards, tokenize
+
+def analyze_cards(text, tokens=None):
     """Extract and analyze spell cards from the text"""
+    if tokens is None:
+        tokens = tokenize(text)
+
     cards = []
+    property_names = {
+        'requirements': 'Requirements',
+        'range': 'Range',
+        'attack': 'Attack',
+        'damage': 'Damage',
+        'onHit': 'On hit',
+        'onBash': 'On bash',
+        'pitch': 'Pitch'
+    }
     
-    # Pattern to match card entries
-    # Cards seem to start with a name, followed by #XXX, then details
-    card_pattern = r'([A-Za-z\s\']+)\n+#(\d{3})\n+([^\n]+)'
-    
-    # Find all card entries
-    lines = text.split('\n')
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i].strip()
+    for block in split_cards(tokens):
+        card = {}
+        card['name'] = block.name
+        card['id'] = block.id
+        card['types'] = block.types
         
-        # Check if this line contains a card ID
-        if re.match(r'^#\d{3}$', line):
-            # Extract card data
-            card = {}
-            
-            # Get name (previous non-empty line)
-            j = i - 1
-            while j >= 0 and not lines[j].strip():
-                j -= 1
-            if j >= 0:
-                # Sometimes name is split across multiple lines
-                name_parts = []
-                k = j
-                while k >= 0 and lines[k].strip() and not lines[k].strip().startswith('#'):
-                    name_parts.insert(0, lines[k].strip())
-                    k -= 1
-                card['name'] = ' '.join(name_parts)
-            
-            card['id'] = line
-            
-            # Get types (next line after ID)
-            i += 1
-            if i < len(lines):
-                types_line = lines[i].strip()
-                if types_line:
-                    # Types are usually comma-separated
-                    card['types'] = [t.strip() for t in types_line.split(',')]
-            
-            # Look for cost indicators (numbers with | separators)
-            i += 1
-            while i < len(lines) and lines[i].strip() in ['|', '']:
-                i += 1
-            
-            if i < len(lines) and lines[i].strip().isdigit():
-                card['cost1'] = lines[i].strip()
-                i += 1
-                
-                # Skip separator
-                while i < len(lines) and lines[i].strip() in ['|', '']:
-                    i += 1
-                    
-                if i < len(lines) and lines[i].strip().isdigit():
-                    card['cost2'] = lines[i].strip()
-            
-            # Extract other properties
-            properties = {}
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                # Stop if we hit another card
-                if re.match(r'^#\d{3}$', line):
-                    break
-                    
-                # Look for property patterns
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    properties[key.strip()] = value.strip()
-                
-                # Check for next card name pattern (multiple capital words)
-                if i + 1 < len(lines) and re.match(r'^#\d{3}$', lines[i + 1].strip()):
-                    break
-                    
-                i += 1
-            
-            card['properties'] = properties
-            cards.append(card)
-        else:
-            i += 1
+        # Costs are kept as strings here, as printed on the card
+        if len(block.costs) >= 1:
+            card['cost1'] = str(block.costs[0])
+        if len(block.costs) >= 2:
+            card['cost2'] = str(block.costs[1])
+        
+        # Labelled properties ("Range: ...", "On hit: ...")
+        sections = collect_sections(block.body)
+        properties = {}
+        for key, label in property_names.items():
+            if sections[key]:
+                properties[label] = section_text(sections, key)
+        
+        card['properties'] = properties
+        cards.append(card)
     
     return cards
 
@@ -1,9 +1,33 @@
 #!/usr/bin/env python3
 """
 Analyze PDF visual style by converting pages to images
+
+Pages are rendered one at a time in a process pool: each worker asks
+poppler for a single page and encodes every size from that one decode, so
+peak memory is about one rendered page per worker however long the book is.
+
+Each page becomes a resolution ladder (LADDER: thumb, medium, full) in
+WebP and PNG, each rung resized from the one above it. manifest.json in
+pdf_screenshots/ records the files, sizes and ready-made srcset strings:
+
+    {"version": 1, "dpi": 150, "books": {"compendium": {"fileHash": "...", "pageCount": 59, "pages": {"1": {
+        "key": "...", "width": 1275, "height": 1650,
+        "images": {"thumb": {"width": 400, "height": 518, "webp": "compendium_page_1_thumb.webp",
+                             "png": "compendium_page_1_thumb.png"}, "medium": {...}, "full": {...}},
+        "srcset": {"webp": "compendium_page_1_thumb.webp 400w, ...", "png": "..."}}}}}}
+
+Renders are incremental. A page is only re-rendered when its render key
+changes: a hash of its content stream, its /Resources (images, fonts, ...)
+and the render settings. A book whose file hash is unchanged is skipped without even
+reading its pages.
 """
 
+import PyPDF2
+import argparse
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 try:
@@ -15,66 +39,192 @@ except ImportError:
     from pdf2image import convert_from_path
     import PIL
 
-def extract_pdf_pages():
-    """Convert PDF pages to images for visual analysis"""
-    pdf_dir = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/public/books')
-    output_dir = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/pdf_screenshots')
+from page_cache import file_hash, page_digest
+
+PDF_DIR = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/public/books')
+OUTPUT_DIR = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/pdf_screenshots')
+BOOKS = {
+    'core': 'B-COR (AM25).pdf',
+    'compendium': 'B-COM (AM25).pdf',
+    'sheet': 'B-CHS (AM25).pdf'
+}
+DPI = 150
+
+# (rung, max width, max height); None leaves that side unbounded. Largest first.
+LADDER = (('full', None, None), ('medium', 800, None), ('thumb', 400, 600))
+FORMATS = ('webp', 'png')
+WEBP_QUALITY = 80
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def render_page_image(pdf_path, page_num, dpi=DPI):
+    """Render a single 1-based page to a PIL image"""
+    return convert_from_path(str(pdf_path), dpi=dpi, first_page=page_num, last_page=page_num)[0]
+
+
+def image_filename(name, page_num, rung, fmt):
+    """Full-size and thumbnail PNGs keep their original names"""
+    suffix = '' if rung == 'full' else f"_{rung}"
+    return f"{name}_page_{page_num}{suffix}.{fmt}"
+
+
+def page_render_key(page, dpi=DPI, memo=None):
+    """Hash of what a PyPDF2 page draws (content stream and /Resources) plus the render settings.
+
+    Pass the same memo dict for every page of a reader so shared resources are hashed once.
+    """
+    digest = hashlib.sha256(f"{dpi}:{LADDER}:{FORMATS}:{WEBP_QUALITY}".encode())
+    digest.update(page_digest(page, memo).digest())
+    return digest.hexdigest()
+
+
+def save_image(image, path, fmt):
+    if fmt == 'webp':
+        image.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(path, 'PNG')
+
+
+def render_page(pdf_path, name, page_num, output_dir=OUTPUT_DIR, dpi=DPI):
+    """Worker task: render one page once and write every rung of the ladder.
+
+    Returns the page's manifest entry (without its key).
+    """
+    image = render_page_image(pdf_path, page_num, dpi)
+    entry = {'width': image.width, 'height': image.height, 'images': {}}
+    for rung, max_width, max_height in LADDER:
+        scale = min(max_width / image.width if max_width else 1, max_height / image.height if max_height else 1)
+        if scale < 1:
+            # Resize from the previous rung, which is cheaper than going back to the full render
+            smaller = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                                   PIL.Image.Resampling.LANCZOS, reducing_gap=3.0)
+            image.close()
+            image = smaller
+        files = {'width': image.width, 'height': image.height}
+        for fmt in FORMATS:
+            files[fmt] = image_filename(name, page_num, rung, fmt)
+            save_image(image, Path(output_dir) / files[fmt], fmt)
+        entry['images'][rung] = files
+    image.close()
+
+    entry['srcset'] = {fmt: ', '.join(f"{files[fmt]} {files['width']}w"
+                                      for files in reversed(list(entry['images'].values())))
+                       for fmt in FORMATS}
+    return entry
+
+
+def load_manifest(output_dir=OUTPUT_DIR, dpi=DPI):
+    path = Path(output_dir) / MANIFEST_NAME
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('dpi') == dpi:
+            return manifest
+    return {'version': MANIFEST_VERSION, 'dpi': dpi, 'books': {}}
+
+
+def save_manifest(manifest, output_dir=OUTPUT_DIR):
+    tmp_path = Path(output_dir) / f"{MANIFEST_NAME}.partial"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, Path(output_dir) / MANIFEST_NAME)
+
+
+def _files_present(output_dir, page_entry):
+    return all((Path(output_dir) / files[fmt]).exists()
+               for files in page_entry['images'].values() for fmt in FORMATS)
+
+
+def extract_pdf_pages(books=None, workers=None, dpi=DPI, last_page=None, force=False):
+    """Convert PDF pages to images for visual analysis, rendering only pages that changed"""
+    output_dir = OUTPUT_DIR
     output_dir.mkdir(exist_ok=True)
-    
-    pdfs = {
-        'core': pdf_dir / 'B-COR (AM25).pdf',
-        'compendium': pdf_dir / 'B-COM (AM25).pdf',
-        'sheet': pdf_dir / 'B-CHS (AM25).pdf'
-    }
-    
-    for name, pdf_path in pdfs.items():
-        if pdf_path.exists():
-            print(f"Converting {name}...")
-            try:
-                # Convert specific pages that likely show the design language
-                if name == 'core':
-                    # Get cover, table of contents, and a few content pages
-                    pages = convert_from_path(pdf_path, dpi=150, first_page=1, last_page=5)
-                elif name == 'compendium':
-                    # Get cover and some spell card pages
-                    pages = convert_from_path(pdf_path, dpi=150, first_page=1, last_page=10)
-                else:
-                    # Character sheet - just first page
-                    pages = convert_from_path(pdf_path, dpi=150, first_page=1, last_page=1)
-                
-                for i, page in enumerate(pages):
-                    output_path = output_dir / f"{name}_page_{i+1}.png"
-                    page.save(output_path, 'PNG')
-                    print(f"  Saved: {output_path}")
-                    
-                    # Also save a thumbnail for quick reference
-                    thumb = page.copy()
-                    thumb.thumbnail((400, 600), PIL.Image.Resampling.LANCZOS)
-                    thumb_path = output_dir / f"{name}_page_{i+1}_thumb.png"
-                    thumb.save(thumb_path, 'PNG')
-                    
-            except Exception as e:
-                print(f"  Error: {e}")
-                print("  Trying alternative method...")
-                # Try using system command as fallback
+    manifest = load_manifest(output_dir, dpi)
+
+    tasks = []
+    for name in books or BOOKS:
+        pdf_path = PDF_DIR / BOOKS[name]
+        if not pdf_path.exists():
+            continue
+        book_hash = file_hash(str(pdf_path))
+        book = manifest['books'].get(name)
+        if (not force and book and book['fileHash'] == book_hash and not last_page
+                and len(book['pages']) == book['pageCount']
+                and all(_files_present(output_dir, page) for page in book['pages'].values())):
+            print(f"{name}: unchanged ({len(book['pages'])} pages)")
+            continue
+
+        with open(pdf_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            pages = len(reader.pages)
+            memo = {}
+            keys = {page_num: page_render_key(reader.pages[page_num - 1], dpi, memo)
+                    for page_num in range(1, min(pages, last_page or pages) + 1)}
+
+        previous = book['pages'] if book else {}
+        # A partial (--last-page) run can't vouch for the rest of the book, so leave the hash unset
+        book = manifest['books'][name] = {'fileHash': None if last_page else book_hash,
+                                          'pageCount': pages, 'pages': {}}
+        stale = []
+        for page_num, key in keys.items():
+            entry = previous.get(str(page_num))
+            if not force and entry and entry['key'] == key and _files_present(output_dir, entry):
+                book['pages'][str(page_num)] = entry
+            else:
+                stale.append(page_num)
+        if last_page:
+            # Pages past --last-page were not looked at; keep what was there
+            for page_num, entry in previous.items():
+                if int(page_num) > last_page and int(page_num) <= pages:
+                    book['pages'][page_num] = entry
+        print(f"Converting {name}: {len(stale)} of {len(keys)} pages changed")
+        tasks.extend((pdf_path, name, page_num, keys[page_num]) for page_num in stale)
+
+    if tasks:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(render_page, pdf_path, name, page_num, output_dir, dpi):
+                       (name, page_num, key) for pdf_path, name, page_num, key in tasks}
+            for future in as_completed(futures):
+                name, page_num, key = futures[future]
                 try:
-                    os.system(f"sips -s format png '{pdf_path}' --out '{output_dir}/{name}_page_1.png' --pageIndex 1")
-                except:
+                    entry = future.result()
+                except Exception as e:
+                    print(f"  Error on {name} page {page_num}: {e}")
                     print("  Could not convert PDF. Please install poppler: brew install poppler")
+                    continue
+                manifest['books'][name]['pages'][str(page_num)] = {'key': key, **entry}
+                print(f"  Saved: {name} page {page_num}")
+
+    for book in manifest['books'].values():
+        book['pages'] = dict(sorted(book['pages'].items(), key=lambda item: int(item[0])))
+    save_manifest(manifest, output_dir)
 
 def analyze_images():
     """Analyze the extracted images to identify design patterns"""
-    output_dir = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/pdf_screenshots')
-    
+    output_dir = OUTPUT_DIR
+
     if output_dir.exists():
         images = list(output_dir.glob("*.png"))
         print(f"\nExtracted {len(images)} images for analysis")
         print("\nImages available at:")
         for img in sorted(images):
-            if 'thumb' not in img.name:
+            if '_thumb' not in img.name and '_medium' not in img.name:
                 print(f"  {img}")
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Render the Archmajesty PDFs to WebP/PNG page images")
+    parser.add_argument('--books', nargs='+', choices=list(BOOKS), help="Books to render (default: all)")
+    parser.add_argument('--workers', type=int, default=0, help="Render processes (0 = one per CPU)")
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--last-page', type=int, help="Only render up to this page of each book")
+    parser.add_argument('--force', action='store_true', help="Re-render pages even if unchanged")
+    args = parser.parse_args()
+
     print("Attempting to extract visual design from PDFs...")
-    extract_pdf_pages()
-    analyze_images()
\ No newline at end of file
+    extract_pdf_pages(args.books, args.workers, args.dpi, args.last_page, args.force)
+    analyze_images()
+
+if __name__ == "__main__":
+    main()
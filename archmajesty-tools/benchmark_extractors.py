@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark every card extractor on the real compendium and on scaled copies.
+
+Each extractor's parse entry point is timed on COM_extracted.txt and on
+copies of it repeated 10x and 100x (page markers renumbered so the copy
+reads as one long book). Every run happens in a fresh process, so the peak
+RSS reported is that extractor's own and not left over from an earlier run.
+
+Results are printed as a table and saved as JSON under benchmarks/. Pass
+--baseline with an earlier results file to flag runs that got slower.
+
+Usage:
+    python benchmark_extractors.py
+    python benchmark_extractors.py --scales 1 10 --repeat 5
+    python benchmark_extractors.py --baseline benchmarks/bench-20250101-120000.json
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+COM_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/extracted_text/COM_extracted.txt"
+BENCH_DIR = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/benchmarks"
+
+# name -> (module, extractor class or None for a plain function, parse method)
+EXTRACTORS = {
+    'extract_archmajesty_data': ('extract_archmajesty_data', 'ArcmajestyDataExtractor', 'extract_spell_cards'),
+    'extract_spell_cards': ('extract_spell_cards', 'SpellCardExtractor', 'extract_card_data'),
+    'extract_cards_improved': ('extract_cards_improved', 'ImprovedCardExtractor', 'extract_cards'),
+    'extract_cards_final': ('extract_cards_final', None, 'extract_spell_cards'),
+    'analyze_game_data': ('analyze_game_data', None, 'analyze_cards'),
+}
+
+DEFAULT_SCALES = (1, 10, 100)
+# A run this much slower than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 1.2
+
+PAGE_MARKER = re.compile(r'---\s*PAGE\s+(\d+)\s*---')
+
+
+def scaled_path(text_path: str, scale: int) -> str:
+    base = os.path.splitext(os.path.basename(text_path))[0]
+    return os.path.join(BENCH_DIR, 'scaled', f"{base}_x{scale}.txt")
+
+
+def write_scaled_copy(text_path: str, scale: int) -> str:
+    """Write text_path repeated `scale` times, continuing the page numbering"""
+    if scale == 1:
+        return text_path
+
+    out_path = scaled_path(text_path, scale)
+    if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(text_path):
+        return out_path
+
+    with open(text_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    page_count = max((int(n) for n in PAGE_MARKER.findall(text)), default=0)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + '.partial'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for copy in range(scale):
+            offset = copy * page_count
+            f.write(PAGE_MARKER.sub(lambda m: f"--- PAGE {int(m.group(1)) + offset} ---", text))
+            if not text.endswith('\n'):
+                f.write('\n')
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def load_parser(name: str):
+    """Return a fresh extractor's parse entry point: text -> list of card dicts"""
+    module_name, class_name, method_name = EXTRACTORS[name]
+    module = importlib.import_module(module_name)
+    if class_name:
+        return getattr(getattr(module, class_name)(), method_name)
+    return getattr(module, method_name)
+
+
+def _run_once(name: str, text_path: str, repeat: int) -> Dict:
+    """Time one extractor on one file. Runs inside a fresh worker process."""
+    with open(text_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    rss_before = _peak_rss_bytes()
+
+    times = []
+    cards = []
+    for _ in range(repeat):
+        parse = load_parser(name)
+        start = time.perf_counter()
+        cards = parse(text)
+        times.append(time.perf_counter() - start)
+
+    return {
+        'seconds': min(times),
+        'all_seconds': times,
+        'cards': len(cards),
+        'lines': text.count('\n') + 1,
+        'bytes': len(text.encode('utf-8')),
+        'peak_rss_bytes': _peak_rss_bytes(),
+        'rss_before_parse_bytes': rss_before,
+    }
+
+
+def run_benchmark(name: str, text_path: str, repeat: int) -> Dict:
+    # Spawn (not fork) so the child's peak RSS doesn't start from ours
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        result = executor.submit(_run_once, name, text_path, repeat).result()
+
+    seconds = result['seconds'] or 1e-9
+    result['cards_per_sec'] = result['cards'] / seconds
+    result['lines_per_sec'] = result['lines'] / seconds
+    return result
+
+
+def compare_to_baseline(results: List[Dict], baseline_path: str) -> List[str]:
+    """Return a message for every run that is slower than the baseline by the threshold"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['extractor'], r['scale']): r for r in baseline['results']}
+
+    regressions = []
+    for result in results:
+        old = previous.get((result['extractor'], result['scale']))
+        if not old:
+            continue
+        ratio = result['seconds'] / (old['seconds'] or 1e-9)
+        result['baseline_ratio'] = ratio
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append(f"{result['extractor']} x{result['scale']}: "
+                               f"{old['seconds']:.4f}s -> {result['seconds']:.4f}s ({ratio:.2f}x)")
+        if result['cards'] != old['cards']:
+            regressions.append(f"{result['extractor']} x{result['scale']}: "
+                               f"card count {old['cards']} -> {result['cards']}")
+    return regressions
+
+
+def print_table(results: List[Dict]) -> None:
+    print(f"\n{'extractor':<26} {'scale':>5} {'cards':>7} {'seconds':>9} {'cards/s':>10} "
+          f"{'lines/s':>11} {'peak RSS':>9}")
+    for r in results:
+        print(f"{r['extractor']:<26} {r['scale']:>5} {r['cards']:>7} {r['seconds']:>9.4f} "
+              f"{r['cards_per_sec']:>10.0f} {r['lines_per_sec']:>11.0f} "
+              f"{r['peak_rss_bytes'] / (1024 * 1024):>7.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the card extractors")
+    parser.add_argument('--text-file', default=COM_FILE, help="Compendium text to benchmark on")
+    parser.add_argument('--extractors', nargs='+', choices=sorted(EXTRACTORS), default=list(EXTRACTORS),
+                        help="Extractors to run (default: all)")
+    parser.add_argument('--scales', nargs='+', type=int, default=list(DEFAULT_SCALES),
+                        help="Copies of the text to parse (default: 1 10 100)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per benchmark; the fastest is kept")
+    parser.add_argument('--output', help="Results JSON path (default: benchmarks/bench-<timestamp>.json)")
+    parser.add_argument('--baseline', help="Earlier results JSON to check for regressions")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        text_path = write_scaled_copy(args.text_file, scale)
+        for name in args.extractors:
+            print(f"Benchmarking {name} x{scale}...")
+            result = run_benchmark(name, text_path, args.repeat)
+            result.update({'extractor': name, 'scale': scale, 'text_file': text_path})
+            results.append(result)
+
+    regressions = compare_to_baseline(results, args.baseline) if args.baseline else []
+    print_table(results)
+
+    output_path = args.output or os.path.join(BENCH_DIR, time.strftime('bench-%Y%m%d-%H%M%S.json'))
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'baseline': args.baseline,
+            'regressions': regressions,
+            'results': results
+        }, f, indent=2)
+    print(f"\nResults saved to: {output_path}")
+
+    if regressions:
+        print("\nRegressions against baseline:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Columnar (struct-of-arrays) view of the spell card pool for analytics.
+
+spellCards.json is an array of nested objects, so every statistic loops
+over dicts in Python. Here the card pool becomes a handful of NumPy arrays:
+
+    primary_cost, secondary_cost   int16, -1 where a card has no cost
+    type_matrix                    bool (cards x types), True if the card has the type
+    requirements/range/            dictionary encoded: int16 codes into a values
+    attack/damage                  list, -1 for none (⸻ or missing)
+
+so analytics are vectorized one-liners, e.g.
+
+    cols = load_columns(path)
+    dict(zip(cols.type_names, cols.type_matrix.sum(axis=0)))        # type counts
+    np.bincount(cols.primary_cost[cols.primary_cost >= 0])          # cost curve
+    cols.type_matrix[:, cols.type_index('Wind')] & (cols.attack == -1)  # auto-hit Wind cards
+
+Columns are saved as a compressed .npz; the type matrix is bit-packed on
+disk. If pyarrow is installed, an Arrow IPC (Feather) file with dictionary
+columns is written as well for use from pandas/polars/DuckDB.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+from card_records import SpellCard
+
+NO_VALUE = -1
+DICTIONARY_FIELDS = ('requirements', 'range', 'attack', 'damage')
+
+
+class CardColumns(NamedTuple):
+    ids: np.ndarray
+    names: np.ndarray
+    primary_cost: np.ndarray
+    secondary_cost: np.ndarray
+    type_names: Tuple[str, ...]
+    type_matrix: np.ndarray
+    requirements: np.ndarray
+    requirements_values: Tuple[str, ...]
+    range: np.ndarray
+    range_values: Tuple[str, ...]
+    attack: np.ndarray
+    attack_values: Tuple[str, ...]
+    damage: np.ndarray
+    damage_values: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def type_index(self, type_name: str) -> int:
+        return self.type_names.index(type_name)
+
+    def decode(self, field: str) -> List[Optional[str]]:
+        """Turn a dictionary-encoded column back into strings"""
+        values = getattr(self, f"{field}_values")
+        return [values[code] if code != NO_VALUE else None for code in getattr(self, field)]
+
+
+def _dictionary_encode(values: List[Optional[str]]) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    index = {}
+    codes = np.full(len(values), NO_VALUE, dtype=np.int16)
+    for i, value in enumerate(values):
+        if value is None or value == '⸻':
+            continue
+        codes[i] = index.setdefault(value, len(index))
+    return codes, tuple(index)
+
+
+def _costs(values: List[Optional[int]]) -> np.ndarray:
+    return np.array([NO_VALUE if v is None else v for v in values], dtype=np.int16)
+
+
+def build_columns(cards: Iterable) -> CardColumns:
+    """Build columns from SpellCard records or spellCards.json dicts"""
+    cards = [card if isinstance(card, SpellCard) else SpellCard.from_dict(card) for card in cards]
+
+    type_names = tuple(sorted({t for card in cards for t in card.types}))
+    type_column = {name: i for i, name in enumerate(type_names)}
+    type_matrix = np.zeros((len(cards), len(type_names)), dtype=bool)
+    for row, card in enumerate(cards):
+        type_matrix[row, [type_column[t] for t in card.types]] = True
+
+    encoded = {}
+    for field in DICTIONARY_FIELDS:
+        codes, values = _dictionary_encode([getattr(card, field) for card in cards])
+        encoded[field] = codes
+        encoded[f"{field}_values"] = values
+
+    return CardColumns(
+        ids=np.array([card.id for card in cards], dtype=str),
+        names=np.array([card.name or '' for card in cards], dtype=str),
+        primary_cost=_costs([card.primaryCost for card in cards]),
+        secondary_cost=_costs([card.secondaryCost for card in cards]),
+        type_names=type_names,
+        type_matrix=type_matrix,
+        **encoded
+    )
+
+
+def type_counts(columns: CardColumns) -> Dict[str, int]:
+    return dict(zip(columns.type_names, columns.type_matrix.sum(axis=0).tolist()))
+
+
+def save_columns(columns: CardColumns, path: str) -> None:
+    """Write columns to a compressed .npz (plus .arrow next to it when pyarrow is available)"""
+    arrays = {
+        'ids': columns.ids,
+        'names': columns.names,
+        'primary_cost': columns.primary_cost,
+        'secondary_cost': columns.secondary_cost,
+        'type_names': np.array(columns.type_names, dtype=str),
+        'type_bits': np.packbits(columns.type_matrix, axis=1),
+    }
+    for field in DICTIONARY_FIELDS:
+        arrays[field] = getattr(columns, field)
+        arrays[f"{field}_values"] = np.array(getattr(columns, f"{field}_values"), dtype=str)
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+    if pa is not None:
+        write_arrow(columns, path.rsplit('.', 1)[0] + '.arrow')
+
+
+def load_columns(path: str) -> CardColumns:
+    with np.load(path) as data:
+        type_names = tuple(data['type_names'].tolist())
+        dictionaries = {}
+        for field in DICTIONARY_FIELDS:
+            dictionaries[field] = data[field]
+            dictionaries[f"{field}_values"] = tuple(data[f"{field}_values"].tolist())
+        return CardColumns(
+            ids=data['ids'],
+            names=data['names'],
+            primary_cost=data['primary_cost'],
+            secondary_cost=data['secondary_cost'],
+            type_names=type_names,
+            type_matrix=np.unpackbits(data['type_bits'], axis=1, count=len(type_names)).astype(bool),
+            **dictionaries
+        )
+
+
+def write_arrow(columns: CardColumns, path: str) -> None:
+    """Arrow IPC file with native dictionary columns and one bool column per type"""
+    fields = {
+        'id': pa.array(columns.ids.tolist()),
+        'name': pa.array(columns.names.tolist()),
+        'primaryCost': pa.array(columns.primary_cost, mask=columns.primary_cost == NO_VALUE),
+        'secondaryCost': pa.array(columns.secondary_cost, mask=columns.secondary_cost == NO_VALUE),
+    }
+    for field in DICTIONARY_FIELDS:
+        codes = getattr(columns, field)
+        indices = pa.array(codes, mask=codes == NO_VALUE)
+        fields[field] = pa.DictionaryArray.from_arrays(indices, pa.array(getattr(columns, f"{field}_values"),
+                                                                         type=pa.string()))
+    for i, type_name in enumerate(columns.type_names):
+        fields[f"type_{type_name}"] = pa.array(columns.type_matrix[:, i])
+    feather.write_feather(pa.table(fields), path)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Compiler and vectorized evaluator for card attack and damage expressions.
+
+spellCards.json keeps attack and damage as text ("D20 + MT or WL",
+"10 + AG", "⸻"). compile_expression() parses one into a small AST:
+
+    Dice(count, sides)      D20
+    Constant(value)         10
+    Attribute(codes)        MT, "MT or WL" (the player picks the best), ANY (all three)
+
+and cardExpressions.json stores it next to the text for every card:
+
+    {"version": 1, "cards": [{"id": "#001",
+       "attack": {"text": "D20 + AG", "terms": [{"dice": [1, 20]}, {"attribute": ["AG"]}]},
+       "damage": {"text": "10 +", "terms": [{"constant": 10}, {"attribute": ["AG"]}], "inferred": true}}, ...]}
+
+The extraction sometimes drops the attribute after the damage '+'
+("10 +"). In the compendium the damage attribute always matches the
+attack's, so it is taken from the attack and marked "inferred"; for
+auto-hit cards it is left open (any attribute) and marked "incomplete".
+
+evaluate() computes hit chance and expected damage for every card at once
+over a grid of MT/AG/WL values (0-3) and target Defence values. Attack
+rolls hit when they meet the target's Defence; an attack of ⸻ with damage
+automatically hits (Core Rules, Automatic Hits). Critical hits and
+bonuses from effects are not modelled.
+"""
+
+import argparse
+import json
+import re
+from itertools import product
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from card_records import ATTRIBUTE_CODES, load_cards
+
+EXPRESSIONS_VERSION = 1
+NONE_MARK = '⸻'
+ATTRIBUTE_VALUES = range(0, 4)
+DEFAULT_DEFENCES = range(5, 21)
+
+CARDS_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/spellCards.json"
+EXPRESSIONS_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/cardExpressions.json"
+
+TERM_PATTERN = re.compile(r'\s*(?:(?P<dice>(?P<count>\d*)[dD](?P<sides>\d+))(?![\w/])'
+                          r'|(?P<constant>\d+)(?![\w/])'
+                          r'|(?P<attribute>(?:MT|AG|WL|ANY)(?:\s+or\s+(?:MT|AG|WL))*)\b)', re.IGNORECASE)
+PLUS_PATTERN = re.compile(r'\s*\+')
+
+
+class Dice(NamedTuple):
+    count: int
+    sides: int
+
+
+class Constant(NamedTuple):
+    value: int
+
+
+class Attribute(NamedTuple):
+    codes: Tuple[str, ...]  # Empty when the text ends in a dangling '+'
+
+
+Term = Union[Dice, Constant, Attribute]
+
+
+class Expression(NamedTuple):
+    text: str
+    terms: Tuple[Term, ...]
+    inferred: bool = False
+    incomplete: bool = False
+
+    @property
+    def attribute(self) -> Optional[Attribute]:
+        return next((term for term in self.terms if isinstance(term, Attribute)), None)
+
+    def to_dict(self) -> Dict:
+        terms = []
+        for term in self.terms:
+            if isinstance(term, Dice):
+                terms.append({'dice': [term.count, term.sides]})
+            elif isinstance(term, Constant):
+                terms.append({'constant': term.value})
+            else:
+                terms.append({'attribute': list(term.codes)})
+        data = {'text': self.text, 'terms': terms}
+        if self.inferred:
+            data['inferred'] = True
+        if self.incomplete:
+            data['incomplete'] = True
+        return data
+
+
+def _attribute_codes(text: str) -> Tuple[str, ...]:
+    codes = tuple(code.upper() for code in re.split(r'\s+or\s+', text, flags=re.IGNORECASE))
+    return ATTRIBUTE_CODES if 'ANY' in codes else codes
+
+
+def compile_expression(text: Optional[str]) -> Optional[Expression]:
+    """Parse 'D20 + MT or WL' style text; None for ⸻, missing or non-expression text.
+
+    Parsing stops at the first word that isn't part of the expression, so
+    effect text the extractor ran into the field is ignored.
+    """
+    if not text or text.startswith(NONE_MARK):
+        return None
+
+    terms = []
+    position = 0
+    while True:
+        match = TERM_PATTERN.match(text, position)
+        if match is None:
+            if terms:
+                terms.append(Attribute(()))  # Dangling '+': the attribute was lost
+            break
+        if match.group('dice'):
+            terms.append(Dice(int(match.group('count') or 1), int(match.group('sides'))))
+        elif match.group('constant'):
+            terms.append(Constant(int(match.group('constant'))))
+        else:
+            terms.append(Attribute(_attribute_codes(match.group('attribute'))))
+        position = match.end()
+        plus = PLUS_PATTERN.match(text, position)
+        if plus is None:
+            break
+        position = plus.end()
+
+    return Expression(text, tuple(terms)) if terms else None
+
+
+def compile_card(card) -> Tuple[Optional[Expression], Optional[Expression]]:
+    """Attack and damage expressions for a card, filling in a lost damage attribute"""
+    attack = compile_expression(card.attack)
+    damage = compile_expression(card.damage)
+    if damage is not None and damage.attribute == Attribute(()):
+        source = attack.attribute if attack is not None else None
+        if source is not None:
+            terms = tuple(source if term == Attribute(()) else term for term in damage.terms)
+            damage = damage._replace(terms=terms, inferred=True)
+        else:
+            terms = tuple(Attribute(ATTRIBUTE_CODES) if term == Attribute(()) else term for term in damage.terms)
+            damage = damage._replace(terms=terms, incomplete=True)
+    return attack, damage
+
+
+class ExpressionArrays(NamedTuple):
+    """Per-card coefficients of the compiled expressions, ready for evaluate()"""
+    ids: List[str]
+    auto_hit: np.ndarray          # bool, damage but no attack roll
+    has_attack: np.ndarray        # bool, any attack (rolled or automatic)
+    attack_constant: np.ndarray   # int
+    attack_attributes: np.ndarray  # bool (cards x MT/AG/WL), best of the set is added
+    attack_survival: np.ndarray   # (cards x max roll + 2) P(dice roll >= t)
+    damage_base: np.ndarray       # float, constants plus mean dice
+    damage_attributes: np.ndarray  # bool (cards x MT/AG/WL)
+
+
+def _dice_survival(dice: Sequence[Dice], size: int) -> np.ndarray:
+    pmf = np.array([1.0])
+    for die in dice:
+        for _ in range(die.count):
+            pmf = np.convolve(pmf, np.r_[0.0, np.full(die.sides, 1.0 / die.sides)])
+    survival = np.zeros(size)
+    tail = np.cumsum(pmf[::-1])[::-1]  # tail[t] = P(roll >= t)
+    survival[:len(tail)] = tail
+    return survival
+
+
+def _attribute_mask(expression: Optional[Expression]) -> List[bool]:
+    attribute = expression.attribute if expression is not None else None
+    codes = attribute.codes if attribute is not None else ()
+    return [code in codes for code in ATTRIBUTE_CODES]
+
+
+def build_arrays(cards: List, compiled: Optional[List[Tuple]] = None) -> ExpressionArrays:
+    compiled = compiled or [compile_card(card) for card in cards]
+    dice = [[t for t in attack.terms if isinstance(t, Dice)] if attack else [] for attack, _ in compiled]
+    max_roll = max((sum(d.count * d.sides for d in card_dice) for card_dice in dice), default=0)
+
+    survival = np.zeros((len(cards), max_roll + 2))
+    for row, card_dice in enumerate(dice):
+        survival[row] = _dice_survival(card_dice, max_roll + 2)
+
+    def constants(expression: Optional[Expression], mean_dice: bool) -> float:
+        """Sum of the constant terms, plus the dice averages when mean_dice is set"""
+        if expression is None:
+            return 0.0
+        total = 0.0
+        for term in expression.terms:
+            if isinstance(term, Constant):
+                total += term.value
+            elif isinstance(term, Dice) and mean_dice:
+                total += term.count * (term.sides + 1) / 2
+        return total
+
+    has_damage = np.array([damage is not None for _, damage in compiled])
+    has_roll = np.array([attack is not None for attack, _ in compiled])
+    return ExpressionArrays(
+        ids=[card.id for card in cards],
+        auto_hit=has_damage & ~has_roll,
+        has_attack=has_damage | has_roll,
+        attack_constant=np.array([constants(attack, mean_dice=False) for attack, _ in compiled]),
+        attack_attributes=np.array([_attribute_mask(attack) for attack, _ in compiled], dtype=bool).reshape(-1, 3),
+        attack_survival=survival,
+        damage_base=np.array([constants(damage, mean_dice=True) for _, damage in compiled]),
+        damage_attributes=np.array([_attribute_mask(damage) for _, damage in compiled], dtype=bool).reshape(-1, 3)
+    )
+
+
+def attribute_grid(values: Sequence[int] = ATTRIBUTE_VALUES) -> np.ndarray:
+    """Every MT/AG/WL combination as rows of a (combinations x 3) array"""
+    return np.array(list(product(values, repeat=len(ATTRIBUTE_CODES))), dtype=np.int64)
+
+
+def _best_attribute(mask: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """(cards x combinations) value of the best allowed attribute, 0 when none applies"""
+    values = np.where(mask[:, None, :], grid[None, :, :], 0)
+    return values.max(axis=2)
+
+
+def evaluate(arrays: ExpressionArrays, values: Sequence[int] = ATTRIBUTE_VALUES,
+             defences: Sequence[int] = DEFAULT_DEFENCES) -> Tuple[np.ndarray, np.ndarray]:
+    """Hit chance and expected damage, each shaped (cards x MT x AG x WL x defences)"""
+    grid = attribute_grid(values)
+    defences = np.asarray(defences)
+    attack_bonus = arrays.attack_constant[:, None] + _best_attribute(arrays.attack_attributes, grid)
+
+    # Roll needed to meet each Defence, looked up in the per-card survival table
+    needed = defences[None, None, :] - attack_bonus[:, :, None]
+    needed = np.clip(needed, 0, arrays.attack_survival.shape[1] - 1).astype(np.int64)
+    n, g, d = needed.shape
+    hit = np.take_along_axis(arrays.attack_survival, needed.reshape(n, -1), axis=1).reshape(n, g, d)
+    hit[arrays.auto_hit] = 1.0
+    hit[~arrays.has_attack] = 0.0
+
+    damage = arrays.damage_base[:, None] + _best_attribute(arrays.damage_attributes, grid)
+    expected = hit * damage[:, :, None]
+
+    shape = (n,) + (len(values),) * len(ATTRIBUTE_CODES) + (d,)
+    return hit.reshape(shape), expected.reshape(shape)
+
+
+def build_expressions(cards: List) -> Dict:
+    entries = []
+    for card, (attack, damage) in zip(cards, (compile_card(card) for card in cards)):
+        entries.append({
+            'id': card.id,
+            'attack': attack.to_dict() if attack else None,
+            'damage': damage.to_dict() if damage else None
+        })
+    return {'version': EXPRESSIONS_VERSION, 'cards': entries}
+
+
+def write_expressions(cards: List, path: str = EXPRESSIONS_FILE) -> Dict:
+    expressions = build_expressions(cards)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(expressions, f, separators=(',', ':'), ensure_ascii=False)
+    return expressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile card attack/damage expressions")
+    parser.add_argument('--cards', default=CARDS_FILE)
+    parser.add_argument('--output', default=EXPRESSIONS_FILE)
+    parser.add_argument('--attributes', nargs=3, type=int, default=(2, 2, 2), metavar=('MT', 'AG', 'WL'),
+                        choices=ATTRIBUTE_VALUES,
+                        help=f"Attribute values ({ATTRIBUTE_VALUES.start}-{ATTRIBUTE_VALUES.stop - 1}) "
+                             f"for the ranking printout")
+    parser.add_argument('--defence', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    cards = load_cards(args.cards)
+    expressions = write_expressions(cards, args.output)
+    damage = [entry['damage'] for entry in expressions['cards'] if entry['damage']]
+    print(f"Compiled {len(expressions['cards'])} cards -> {args.output}")
+    print(f"  {sum(1 for e in expressions['cards'] if e['attack'])} attack rolls, {len(damage)} damage expressions "
+          f"({sum(1 for e in damage if e.get('inferred'))} inferred, "
+          f"{sum(1 for e in damage if e.get('incomplete'))} incomplete)")
+
+    hit, expected = evaluate(build_arrays(cards), defences=[args.defence])
+    mt, ag, wl = args.attributes
+    expected = expected[:, mt, ag, wl, 0]
+    print(f"\nExpected damage at MT {mt} / AG {ag} / WL {wl} against Defence {args.defence}:")
+    for row in np.argsort(-expected, kind='stable')[:args.top]:
+        print(f"  {cards[row].id} {cards[row].name:28} {expected[row]:6.2f}  (hit {hit[row, mt, ag, wl, 0]:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Precomputed facet bitsets for filtering the card pool.
+
+Every filter value gets a bitset over card positions in spellCards.json
+(bit i set when card i matches), so any combination of filters is a few
+bitwise ANDs instead of a pass over every card:
+
+    type           one facet per card type (Physical, Stone, Metal, Wind, ...)
+    primaryCost    cost buckets: '0', '5', ... '20', '25+'
+    secondaryCost  same buckets
+    attribute      MT / AG / WL scaling in the attack or damage expression
+    hit            'auto' (attack ⸻) or 'roll'
+    requirements   'yes' or 'no'
+
+Bitsets are stored as arrays of unsigned 32-bit words, least significant
+bit first, which JavaScript can AND directly (`a[i] & b[i]`). cardFacets.json:
+
+    {"version": 1, "ids": ["#001", ...], "words": 6,
+     "facets": {"type": {"Physical": [4294967295, ...], ...}, "hit": {"auto": [...], ...}, ...}}
+
+filter_cards() below is the reference for combining them: values within a
+facet are ORed, facets are ANDed.
+"""
+
+import argparse
+import json
+from typing import Dict, List
+
+import numpy as np
+
+from card_columns import NO_VALUE, CardColumns, build_columns
+from card_records import ATTRIBUTE_CODES, attribute_codes, load_cards
+
+FACETS_VERSION = 1
+COST_BUCKETS = (0, 5, 10, 15, 20, 25)  # The last bucket also holds every higher cost
+CARDS_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/spellCards.json"
+FACETS_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/cardFacets.json"
+
+
+def cost_bucket_labels() -> List[str]:
+    return [str(c) for c in COST_BUCKETS[:-1]] + [f"{COST_BUCKETS[-1]}+"]
+
+
+def _cost_masks(costs: np.ndarray) -> Dict[str, np.ndarray]:
+    # Bucket index per card; -1 for cards without a cost
+    buckets = np.searchsorted(COST_BUCKETS, costs, side='right') - 1
+    buckets[costs == NO_VALUE] = -1
+    return {label: buckets == i for i, label in enumerate(cost_bucket_labels())}
+
+
+def _attribute_masks(columns: CardColumns) -> Dict[str, np.ndarray]:
+    masks = {code: np.zeros(len(columns), dtype=bool) for code in ATTRIBUTE_CODES}
+    for field in ('attack', 'damage'):
+        codes = getattr(columns, field)
+        values = getattr(columns, f"{field}_values")
+        # Which attributes each dictionary value mentions, then gather per card
+        value_has = np.zeros((len(values) + 1, len(ATTRIBUTE_CODES)), dtype=bool)
+        for row, value in enumerate(values):
+            for code in attribute_codes(value):
+                value_has[row, ATTRIBUTE_CODES.index(code)] = True
+        per_card = value_has[codes]  # NO_VALUE (-1) picks the all-False last row
+        for i, code in enumerate(ATTRIBUTE_CODES):
+            masks[code] |= per_card[:, i]
+    return masks
+
+
+def facet_masks(columns: CardColumns) -> Dict[str, Dict[str, np.ndarray]]:
+    """Boolean mask per facet value, over cards in column order"""
+    return {
+        'type': {name: columns.type_matrix[:, i] for i, name in enumerate(columns.type_names)},
+        'primaryCost': _cost_masks(columns.primary_cost),
+        'secondaryCost': _cost_masks(columns.secondary_cost),
+        'attribute': _attribute_masks(columns),
+        'hit': {'auto': columns.attack == NO_VALUE, 'roll': columns.attack != NO_VALUE},
+        'requirements': {'yes': columns.requirements != NO_VALUE, 'no': columns.requirements == NO_VALUE},
+    }
+
+
+def to_words(mask: np.ndarray) -> np.ndarray:
+    """Pack a boolean mask into little-endian uint32 words (bit i = card i)"""
+    padded = np.zeros(-(-len(mask) // 32) * 32, dtype=bool)
+    padded[:len(mask)] = mask
+    return np.packbits(padded, bitorder='little').view('<u4')
+
+
+def from_words(words, count: int) -> np.ndarray:
+    data = np.asarray(words, dtype='<u4').view(np.uint8)
+    return np.unpackbits(data, bitorder='little', count=count).astype(bool)
+
+
+def build_facets(cards) -> Dict:
+    columns = cards if isinstance(cards, CardColumns) else build_columns(cards)
+    facets = {}
+    for facet, values in facet_masks(columns).items():
+        facets[facet] = {value: to_words(mask).tolist() for value, mask in values.items()}
+    return {
+        'version': FACETS_VERSION,
+        'ids': columns.ids.tolist(),
+        'words': -(-len(columns) // 32),
+        'facets': facets
+    }
+
+
+def filter_cards(facets: Dict, selection: Dict[str, List[str]]) -> List[int]:
+    """Card positions matching a selection like {'type': ['Wind'], 'hit': ['auto']}"""
+    result = np.full(facets['words'], 0xFFFFFFFF, dtype=np.uint32)
+    for facet, values in selection.items():
+        if not values:
+            continue
+        combined = np.zeros(facets['words'], dtype=np.uint32)
+        for value in values:
+            combined |= np.asarray(facets['facets'][facet].get(value, 0), dtype=np.uint32)
+        result &= combined
+    return np.flatnonzero(from_words(result, len(facets['ids']))).tolist()
+
+
+def write_facets(cards, path: str = FACETS_FILE) -> Dict:
+    facets = build_facets(cards)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(facets, f, separators=(',', ':'))
+    return facets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the card facet bitsets")
+    parser.add_argument('--cards', default=CARDS_FILE)
+    parser.add_argument('--output', default=FACETS_FILE)
+    parser.add_argument('--filter', nargs='*', metavar='FACET=VALUE',
+                        help="Filter the fresh facets and print the matches, e.g. type=Wind hit=auto")
+    args = parser.parse_args()
+
+    cards = load_cards(args.cards)
+    facets = write_facets(cards, args.output)
+    for facet, values in facets['facets'].items():
+        print(f"{facet}: " + ", ".join(f"{value}={int(from_words(words, len(cards)).sum())}"
+                                       for value, words in values.items()))
+
+    if args.filter:
+        selection = {}
+        for item in args.filter:
+            facet, value = item.split('=', 1)
+            selection.setdefault(facet, []).append(value)
+        for doc in filter_cards(facets, selection):
+            print(f"  {cards[doc].id}: {cards[doc].name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Crop every spell card on the compendium pages into its own image.
+
+Card positions come from the PDF itself. Each #NNN id is found with its
+glyph position (line_reassembly.collect_runs), and the card is the
+smallest card-sized frame rectangle drawn around it (the compendium draws
+every card as a 238.5 x ~100-150 pt box). If no frame is found, the card
+falls back to its page column, from the id down to the next id in that
+column.
+
+Each card is rendered on its own through page_tiles.get_tile_path, which
+asks poppler for just the card's region and keeps it in the tile cache,
+and written as WebP and PNG to public/images/cards/ (pages are handled in
+a process pool). Only cards that link to a spellCards.json entry are
+cropped, and every run first deletes the images in that directory that the
+new links no longer reference, so renamed or renumbered cards don't leave
+stale files behind. The manifest there links images back to
+spellCards.json:
+
+    {"version": 1, "dpi": 200,
+     "pages": {"6": {"key": "...", "cards": ["001-earthsteel-bash", ...]}},
+     "cards": {"001-earthsteel-bash": {"id": "#001", "name": "Earthsteel Bash", "page": 6,
+               "bbox": [317.2, 291.4, 555.8, 390.4], "width": 663, "height": 276,
+               "webp": "001-earthsteel-bash.webp", "png": "001-earthsteel-bash.png"}, ...},
+     "spellCards": ["001-earthsteel-bash", null, ...]}
+
+bbox is in PDF points from the top-left, like page_tiles.get_tile.
+spellCards holds one image key (or null) per card, in spellCards.json
+order; ids repeat in the compendium, so cards are matched on id and name,
+and no image is linked to two cards (ambiguous cards stay null).
+Pages are cached by analyze_pdf_style.page_render_key, so re-runs only
+crop pages that changed.
+"""
+
+import PyPDF2
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from PIL import Image
+from PyPDF2.generic import ContentStream
+
+from analyze_pdf_style import BOOKS, PDF_DIR, page_render_key, save_image
+from card_records import load_cards
+from data_bundle import slugify
+from extract_spell_cards import normalize_name
+from line_reassembly import _mult, collect_runs
+from page_tiles import get_tile_path
+
+OUTPUT_DIR = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/public/images/cards')
+CARDS_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/spellCards.json"
+CARD_DPI = 200
+FORMATS = ('webp', 'png')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+CARD_ID = re.compile(r'^#\d{3}$')
+# Files in OUTPUT_DIR that crop_cards wrote, e.g. '001-earthsteel-bash.webp'
+IMAGE_FILE = re.compile(r'^\d{3}(-[a-z0-9-]+)?\.(' + '|'.join(FORMATS) + r')$')
+# Card frames are drawn about 238 pt wide; anything in this range around an id counts
+FRAME_WIDTH = (200, 300)
+FRAME_HEIGHT = (40, 400)
+# Fallback geometry: the two text columns of a compendium page, in points
+COLUMNS = ((54, 297), (315, 558))
+PAGE_BOTTOM_MARGIN = 36
+HEADER_MARGIN = 12
+CROP_PADDING = 2
+
+
+class CardRegion(NamedTuple):
+    id: str
+    name: str
+    page: int                  # 1-based
+    bbox: Tuple[float, ...]    # x0, y0, x1, y1 in points from the top-left
+    key: str                   # image file stem, e.g. '001-earthsteel-bash'
+
+
+def frame_rects(page, reader) -> List[Tuple[float, float, float, float]]:
+    """Every rectangle the page draws, in default user space (x0, y0, x1, y1)"""
+    ctm = [1, 0, 0, 1, 0, 0]
+    stack = []
+    rects = []
+    for operands, operator in ContentStream(page.get_contents(), reader).operations:
+        if operator == b'q':
+            stack.append(ctm)
+        elif operator == b'Q':
+            ctm = stack.pop() if stack else ctm
+        elif operator == b'cm':
+            ctm = _mult([float(value) for value in operands], ctm)
+        elif operator == b're':
+            x, y, w, h = (float(value) for value in operands)
+            corners = [(px * ctm[0] + py * ctm[2] + ctm[4], px * ctm[1] + py * ctm[3] + ctm[5])
+                       for px, py in ((x, y), (x + w, y), (x, y + h), (x + w, y + h))]
+            xs = [corner[0] for corner in corners]
+            ys = [corner[1] for corner in corners]
+            rects.append((min(xs), min(ys), max(xs), max(ys)))
+    return rects
+
+
+def _is_card_frame(rect) -> bool:
+    width, height = rect[2] - rect[0], rect[3] - rect[1]
+    return FRAME_WIDTH[0] <= width <= FRAME_WIDTH[1] and FRAME_HEIGHT[0] <= height <= FRAME_HEIGHT[1]
+
+
+def _fallback_bbox(run, id_runs, page_height) -> Tuple[float, ...]:
+    """Column-wide box from the id's line down to the next id in the same column"""
+    x0, x1 = next((column for column in COLUMNS if column[0] <= run.x <= column[1]), COLUMNS[-1])
+    below = [other.y for other in id_runs if x0 <= other.x <= x1 and other.y < run.y]
+    bottom = max(below) + HEADER_MARGIN if below else PAGE_BOTTOM_MARGIN
+    return (x0, page_height - (run.y + run.size + HEADER_MARGIN), x1, page_height - bottom)
+
+
+def locate_cards(pdf_path) -> List[CardRegion]:
+    """Find every card id on every page and the box around it"""
+    regions = []
+    keys = set()
+    with open(pdf_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        for page_index, page in enumerate(reader.pages):
+            runs = collect_runs(page)
+            id_runs = [run for run in runs if CARD_ID.match(run.text)]
+            if not id_runs:
+                continue
+            page_height = float(page.mediabox.height)
+            frames = [rect for rect in frame_rects(page, reader) if _is_card_frame(rect)]
+            for run in id_runs:
+                # Sample just above the baseline, inside the id's glyphs
+                point_y = run.y + run.size / 3
+                containing = [rect for rect in frames
+                              if rect[0] <= run.x <= rect[2] and rect[1] <= point_y <= rect[3]]
+                if containing:
+                    x0, y0, x1, y1 = min(containing, key=lambda rect: (rect[2] - rect[0]) * (rect[3] - rect[1]))
+                    bbox = (x0 - CROP_PADDING, page_height - y1 - CROP_PADDING,
+                            x1 + CROP_PADDING, page_height - y0 + CROP_PADDING)
+                else:
+                    bbox = _fallback_bbox(run, id_runs, page_height)
+                # The name is printed on the id's line, to its left
+                name_runs = [other for other in runs if abs(other.y - run.y) < run.size / 2
+                             and bbox[0] <= other.x < run.x and not CARD_ID.match(other.text)]
+                name = ' '.join(other.text for other in sorted(name_runs, key=lambda other: other.x))
+                key = image_key(run.text, name, keys)
+                keys.add(key)
+                regions.append(CardRegion(run.text, name, page_index + 1,
+                                          tuple(round(value, 2) for value in bbox), key))
+    return regions
+
+
+def image_key(card_id: str, name: str, taken=()) -> str:
+    """'001-earthsteel-bash'; placeholder cards that repeat an id and name get -2, -3, ..."""
+    base = f"{card_id.lstrip('#')}-{slugify(name)}" if name else card_id.lstrip('#')
+    key, n = base, 1
+    while key in taken:
+        n += 1
+        key = f"{base}-{n}"
+    return key
+
+
+def crop_page(pdf_path, page_num, regions: List[CardRegion], output_dir=OUTPUT_DIR, dpi=CARD_DPI) -> Dict:
+    """Worker task: render each card region of one page and write it; returns manifest entries by key"""
+    entries = {}
+    for region in regions:
+        card = Image.open(get_tile_path(str(pdf_path), page_num, dpi, region.bbox))
+        key = region.key
+        entry = {'id': region.id, 'name': region.name, 'page': page_num, 'bbox': list(region.bbox),
+                 'width': card.width, 'height': card.height}
+        for fmt in FORMATS:
+            entry[fmt] = f"{key}.{fmt}"
+            save_image(card, Path(output_dir) / entry[fmt], fmt)
+        card.close()
+        entries[key] = entry
+    return entries
+
+
+def remove_stale_images(output_dir, keys) -> int:
+    """Delete card images in output_dir whose key is not in keys; returns how many were removed"""
+    removed = 0
+    for path in Path(output_dir).iterdir():
+        if IMAGE_FILE.match(path.name) and path.stem not in keys:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def link_spell_cards(cards, entries: Dict[str, Dict]) -> List[Optional[str]]:
+    """Image key per spellCards.json card.
+
+    Matches on id and name, then on id and the end of the name (the
+    extractor sometimes keeps only the last words of a long name, e.g.
+    'Vitality' for 'Rune of Vitality'), then on the name alone (some
+    extracted cards carry a neighbour's id), then on an id only one image has.
+    The first pass that matches a card decides it, and an image is linked
+    to at most one card: a card stays None if it matches several images or
+    an image an earlier pass linked, and so do cards that match the same
+    image in the same pass.
+    """
+    by_id, by_name = {}, {}
+    for key, entry in entries.items():
+        by_id.setdefault(entry['id'], []).append((normalize_name(entry['name']), key))
+        by_name.setdefault(normalize_name(entry['name']), []).append(key)
+    names = [normalize_name(card.name or '') for card in cards]
+    passes = [
+        lambda card, name: [key for entry_name, key in by_id.get(card.id, []) if entry_name == name],
+        lambda card, name: [key for entry_name, key in by_id.get(card.id, [])
+                            if name and entry_name.endswith(' ' + name)],
+        lambda card, name: by_name.get(name, []) if name else [],
+        lambda card, name: [key for _, key in by_id.get(card.id, [])] if len(by_id.get(card.id, [])) == 1 else [],
+    ]
+    links = [None] * len(cards)
+    decided, taken = set(), set()
+    for matches_of in passes:
+        claims = {}
+        for i, (card, name) in enumerate(zip(cards, names)):
+            if i in decided:
+                continue
+            matches = matches_of(card, name)
+            if matches:
+                decided.add(i)
+                if len(matches) == 1 and matches[0] not in taken:
+                    claims.setdefault(matches[0], []).append(i)
+        for key, claimants in claims.items():
+            if len(claimants) == 1:
+                links[claimants[0]] = key
+            taken.add(key)
+    return links
+
+
+def load_manifest(output_dir=OUTPUT_DIR, dpi=CARD_DPI) -> Dict:
+    path = Path(output_dir) / MANIFEST_NAME
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('dpi') == dpi:
+            return manifest
+    return {'version': MANIFEST_VERSION, 'dpi': dpi, 'pages': {}, 'cards': {}, 'spellCards': []}
+
+
+def crop_cards(pdf_path=PDF_DIR / BOOKS['compendium'], cards_path=CARDS_FILE, output_dir=OUTPUT_DIR,
+               dpi=CARD_DPI, workers=None, force=False) -> Dict:
+    """Crop every linked card of the compendium, re-rendering only pages whose render key changed"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_dir, dpi)
+
+    regions = locate_cards(pdf_path)
+    links = link_spell_cards(load_cards(cards_path), {region.key: {'id': region.id, 'name': region.name}
+                                                      for region in regions})
+    linked = set(key for key in links if key)
+    regions = [region for region in regions if region.key in linked]
+    removed = remove_stale_images(output_dir, linked)
+    if removed:
+        print(f"Removed {removed} images no spellCards.json card links to")
+    by_page = {}
+    for region in regions:
+        by_page.setdefault(region.page, []).append(region)
+
+    with open(pdf_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        memo = {}
+        page_keys = {page_num: page_render_key(reader.pages[page_num - 1], dpi, memo) for page_num in by_page}
+
+    pages, cards, stale = {}, {}, []
+    for page_num, page_regions in by_page.items():
+        previous = manifest['pages'].get(str(page_num))
+        keys = [region.key for region in page_regions]
+        present = all(key in manifest['cards'] and
+                      all((output_dir / manifest['cards'][key][fmt]).exists() for fmt in FORMATS)
+                      for key in keys)
+        if not force and previous and previous['key'] == page_keys[page_num] and previous['cards'] == keys and present:
+            pages[str(page_num)] = previous
+            cards.update((key, manifest['cards'][key]) for key in keys)
+        else:
+            stale.append(page_num)
+    print(f"Cropping {len(regions)} cards: {len(stale)} of {len(by_page)} pages changed")
+
+    if stale:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(crop_page, pdf_path, page_num, by_page[page_num], output_dir, dpi): page_num
+                       for page_num in stale}
+            for future in as_completed(futures):
+                page_num = futures[future]
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    print(f"  Error on page {page_num}: {e}")
+                    continue
+                pages[str(page_num)] = {'key': page_keys[page_num], 'cards': list(entries)}
+                cards.update(entries)
+                print(f"  Page {page_num}: {len(entries)} cards")
+
+    manifest['pages'] = dict(sorted(pages.items(), key=lambda item: int(item[0])))
+    manifest['cards'] = dict(sorted(cards.items()))
+    manifest['spellCards'] = links
+
+    tmp_path = output_dir / f"{MANIFEST_NAME}.partial"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_dir / MANIFEST_NAME)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crop each compendium card into its own image")
+    parser.add_argument('--pdf', default=str(PDF_DIR / BOOKS['compendium']))
+    parser.add_argument('--cards', default=CARDS_FILE, help="spellCards.json to link images to")
+    parser.add_argument('--output-dir', default=str(OUTPUT_DIR))
+    parser.add_argument('--dpi', type=int, default=CARD_DPI)
+    parser.add_argument('--workers', type=int, default=0, help="Render processes (0 = one per CPU)")
+    parser.add_argument('--force', action='store_true', help="Re-crop every page")
+    parser.add_argument('--locate-only', action='store_true', help="Print card boxes without rendering")
+    args = parser.parse_args()
+
+    if args.locate_only:
+        for region in locate_cards(args.pdf):
+            print(f"{region.id} p{region.page} {region.bbox} {region.name}")
+        return
+
+    manifest = crop_cards(args.pdf, args.cards, args.output_dir, args.dpi, args.workers, args.force)
+    linked = sum(1 for key in manifest['spellCards'] if key)
+    print(f"{len(manifest['cards'])} card images, {linked}/{len(manifest['spellCards'])} spellCards.json cards linked")
+
+if __name__ == "__main__":
+    main()
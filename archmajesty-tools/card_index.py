@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Persisted card-boundary index for COM_extracted.txt.
+
+Maps each #NNN card id to the byte offsets of its name, header (id, types
+and costs) and body in the text file, so a single card or a range of cards
+can be re-parsed by seeking straight to it instead of running an extractor
+over the whole compendium. The index is saved next to the text file and is
+rebuilt automatically when the text file's hash no longer matches. The
+file's size and mtime are saved too, so an unchanged file is not re-hashed
+on every load.
+
+Usage:
+    index = CardIndex.load_or_build(com_file)
+    cards = extractor.extract_blocks(index.blocks(parse_id_ranges('#001-#020')))
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterator, List, Optional
+
+from card_lexer import CardBlock, split_cards, tokenize
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.index.json'
+
+
+def text_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_stat(path: str) -> List[int]:
+    """[size, mtime_ns], the cheap check for an unchanged file"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def parse_id_ranges(spec: str) -> List[str]:
+    """Expand '#001-#020,#035' into a list of card ids; raises ValueError on malformed input"""
+    ids = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.match(r'^#?(\d{1,3})(?:\s*-\s*#?(\d{1,3}))?$', part)
+        if not match:
+            raise ValueError(f"Invalid card id or range: {part!r}")
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) else first
+        if last < first:
+            raise ValueError(f"Card id range runs backwards: {part!r}")
+        ids.extend(f"#{n:03d}" for n in range(first, last + 1))
+    if not ids:
+        raise ValueError(f"No card ids in {spec!r}")
+    return ids
+
+
+def _byte_offsets(text: str, char_positions: List[int]) -> Dict[int, int]:
+    """Map sorted character offsets to UTF-8 byte offsets in one pass"""
+    offsets = {}
+    byte_pos = 0
+    char_pos = 0
+    for pos in sorted(set(char_positions)):
+        byte_pos += len(text[char_pos:pos].encode('utf-8'))
+        char_pos = pos
+        offsets[pos] = byte_pos
+    return offsets
+
+
+class CardIndex:
+    def __init__(self, text_path: str, file_hash: str, entries: List[Dict], stat: Optional[List[int]] = None):
+        self.text_path = text_path
+        self.file_hash = file_hash
+        self.entries = entries
+        self.stat = stat
+        self.by_id = {}
+        for entry in entries:
+            self.by_id.setdefault(entry['id'], []).append(entry)
+
+    @staticmethod
+    def index_path(text_path: str) -> str:
+        return text_path + INDEX_SUFFIX
+
+    @classmethod
+    def build(cls, text_path: str) -> 'CardIndex':
+        """Lex the whole text file once and record every card's offsets"""
+        stat = file_stat(text_path)
+        with open(text_path, 'rb') as f:
+            data = f.read()
+        text = data.decode('utf-8')
+
+        blocks = list(split_cards(tokenize(text)))
+        positions = []
+        for block in blocks:
+            positions.extend((block.start, block.id_pos, block.body_start, block.end))
+        to_bytes = _byte_offsets(text, positions)
+
+        entries = []
+        for block in blocks:
+            entries.append({
+                'id': block.id,
+                'page': block.page,
+                'name': [to_bytes[block.start], to_bytes[block.id_pos]],
+                'header': [to_bytes[block.id_pos], to_bytes[block.body_start]],
+                'body': [to_bytes[block.body_start], to_bytes[block.end]]
+            })
+
+        return cls(text_path, text_hash(data), entries, stat)
+
+    def save(self) -> None:
+        with open(self.index_path(self.text_path), 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': INDEX_VERSION,
+                'hash': self.file_hash,
+                'stat': self.stat,
+                'cards': self.entries
+            }, f)
+
+    @classmethod
+    def load(cls, text_path: str) -> Optional['CardIndex']:
+        """Load a saved index, or None if it is missing or stale"""
+        try:
+            with open(cls.index_path(text_path), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if saved.get('version') != INDEX_VERSION:
+            return None
+        stat = file_stat(text_path)
+        index = cls(text_path, saved['hash'], saved['cards'], stat)
+        if saved.get('stat') == stat:
+            return index
+        # Size or mtime changed (or an older index without them): only the hash can tell
+        with open(text_path, 'rb') as f:
+            if text_hash(f.read()) != saved.get('hash'):
+                return None
+        index.save()
+        return index
+
+    @classmethod
+    def load_or_build(cls, text_path: str) -> 'CardIndex':
+        index = cls.load(text_path)
+        if index is None:
+            index = cls.build(text_path)
+            index.save()
+        return index
+
+    def read_block(self, entry: Dict, f=None) -> CardBlock:
+        """Read and lex just one card's bytes from the text file"""
+        if f is None:
+            with open(self.text_path, 'rb') as f:
+                return self.read_block(entry, f)
+
+        start = entry['name'][0]
+        end = entry['body'][1]
+        f.seek(start)
+        chunk = f.read(end - start)
+
+        blocks = list(split_cards(tokenize(chunk.decode('utf-8'))))
+        return blocks[0]._replace(page=entry['page'])
+
+    def blocks(self, ids: List[str]) -> Iterator[CardBlock]:
+        """Yield the lexed block for each requested id that is in the index"""
+        with open(self.text_path, 'rb') as f:
+            for card_id in ids:
+                for entry in self.by_id.get(card_id, []):
+                    yield self.read_block(entry, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the card offset index for a compendium text file")
+    parser.add_argument('text_file', nargs='?',
+                        default="/Users/graves/repos/archmajesty_tools/archmajesty-tools/extracted_text/COM_extracted.txt")
+    args = parser.parse_args()
+
+    index = CardIndex.build(args.text_file)
+    index.save()
+    print(f"Indexed {len(index.entries)} cards -> {CardIndex.index_path(args.text_file)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Shared single-pass lexer for the Arcane Compendium text.
+
+Every spell-card extractor used to split COM_extracted.txt into lines and
+re-test each line against `^#\\d{3}$` and a chain of startswith() checks.
+Here one compiled pattern scans the text once, left to right, and emits
+typed tokens. Because tokens are whitespace-delimited, the word-per-line
+output of extract_pdfs.py and the `--layout lines` output lex the same way.
+
+Token kinds:
+    page       --- PAGE N ---           value: page number (int)
+    card_id    #NNN                     value: '#NNN'
+    type_list  Physical, Stone, Metal   value: tuple of type names
+    cost_sep   |
+    section    Requirements:/Range:/Attack:/Damage:
+                                        value: 'requirements', 'range', ...
+    on_hit     On hit:
+    on_bash    On bash:
+    pitch      [Pitch]
+    word       anything else
+
+split_cards() groups the token stream into one CardBlock per card id, and
+collect_sections() turns a card body into its text sections.
+split_styles() pairs each "Included Cards" list with its style heading.
+Extractors build their own output dicts from those.
+"""
+
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+PAGE = 'page'
+CARD_ID = 'card_id'
+TYPE_LIST = 'type_list'
+COST_SEP = 'cost_sep'
+SECTION = 'section'
+ON_HIT = 'on_hit'
+ON_BASH = 'on_bash'
+PITCH = 'pitch'
+WORD = 'word'
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<page>---\s*PAGE\s+(?P<page_num>\d+)\s*---)
+  | (?P<card_id>(?<!\S)\#\d{3}(?!\S))
+  | (?P<section>(?<!\S)(?P<section_name>Requirements|Range|Attack|Damage)\s*:)
+  | (?P<on_hit>(?<!\S)On\s+hit\s*:)
+  | (?P<on_bash>(?<!\S)On\s+bash\s*:)
+  | (?P<pitch>\[\s*Pitch\s*\])
+  | (?P<cost_sep>(?<!\S)\|(?!\S))
+  | (?P<word>\S+)
+''', re.VERBOSE)
+
+# A type list longer than this is not a card header (e.g. prose after an id)
+MAX_TYPES = 8
+# Card names are short; this bounds the look-back before a card id
+MAX_NAME_WORDS = 5
+NAME_CONNECTORS = {'of', 'the', 'and', 'in', 'to', 'a', 'for', 'as', 'or', 'from', 'with'}
+NAME_STOP_CHARS = ('.', ':', ';', '!', '?', ')', ']', '”', '"', ',')
+# Running page headers that precede the first card name on a page
+RUNNING_HEADERS = (('Major', 'Styles'), ('Minor', 'Styles'), ('Arcanist', 'Artes'), ('Artefacts',))
+FOOTER_WORD = re.compile(r'^(\d+|[✦✧●])$')
+# Layout placeholders on the template pages ("DDD", "DDDD")
+PLACEHOLDER_WORD = re.compile(r'^D+$')
+# Name of the blank card on the template page
+TEMPLATE_NAME = 'SPELL NAME'
+
+STYLE_SYMBOLS = ('✦', '✧')
+STYLE_COUNT = re.compile(r'^x(\d+)$')
+
+ATTRIBUTES = {'MT', 'AG', 'WL', 'ANY'}
+NONE_MARK = '⸻'
+
+
+class Token(NamedTuple):
+    kind: str
+    value: object
+    pos: int
+    end: int
+
+
+class CardBlock(NamedTuple):
+    id: str
+    name: str
+    types: List[str]
+    costs: List[int]
+    body: List[Token]
+    page: Optional[int]
+    start: int  # Offset of the first name word (or the id if unnamed)
+    id_pos: int  # Offset of the #NNN id
+    body_start: int  # Offset just past the type/cost header
+    end: int  # Offset just past the last body token
+
+
+def _raw_tokens(text: str) -> Iterator[Token]:
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        pos, end = match.span()
+        if kind == PAGE:
+            yield Token(PAGE, int(match.group('page_num')), pos, end)
+        elif kind == SECTION:
+            yield Token(SECTION, match.group('section_name').lower(), pos, end)
+        else:
+            yield Token(kind, match.group(kind), pos, end)
+
+
+def tokenize(text: str) -> Iterator[Token]:
+    """Scan the text once and yield typed tokens"""
+    pending = None  # Words after a card id, until we know if they are its types
+    for token in _raw_tokens(text):
+        if pending is not None:
+            if token.kind == WORD and len(pending) < MAX_TYPES:
+                pending.append(token)
+                continue
+            if token.kind == COST_SEP and pending:
+                types = tuple(t for t in (w.value.strip(',') for w in pending) if t)
+                yield Token(TYPE_LIST, types, pending[0].pos, pending[-1].end)
+            else:
+                yield from pending
+            pending = None
+
+        yield token
+        if token.kind == CARD_ID:
+            pending = []
+
+    if pending:
+        yield from pending
+
+
+def _strip_running_header(words: List[Token]) -> List[Token]:
+    values = [w.value for w in words]
+    for header in RUNNING_HEADERS:
+        if tuple(values[:len(header)]) == header:
+            return words[len(header):]
+    return words
+
+
+def take_name(buffer: List[Token]) -> List[Token]:
+    """Pop the name words (of a card, or a style heading) off the end of a token buffer"""
+    count = 0
+    for token in reversed(buffer):
+        if token.kind != WORD or count >= MAX_NAME_WORDS:
+            break
+        word = token.value
+        # Names may end with "!" ("Strike as One!"), but never contain one
+        if word.endswith(NAME_STOP_CHARS) and not (count == 0 and word.endswith('!')):
+            break
+        if FOOTER_WORD.match(word) or PLACEHOLDER_WORD.match(word):
+            break
+        # Numbers are fine inside a name ("Rain of 1,000 Thorns")
+        if not (word[0].isupper() or word[0].isdigit()) and word not in NAME_CONNECTORS:
+            break
+        count += 1
+
+    name_words = buffer[len(buffer) - count:] if count else []
+    # Never start a name on a connector ("of", "the", ...)
+    while name_words and name_words[0].value in NAME_CONNECTORS:
+        name_words = name_words[1:]
+    name_words = _strip_running_header(name_words)
+    if name_words:
+        del buffer[len(buffer) - len(name_words):]
+    return name_words
+
+
+def _strip_footer(body: List[Token]) -> List[Token]:
+    """Drop page numbers and ornaments left at the end of a page"""
+    end = len(body)
+    while end and body[end - 1].kind == WORD and FOOTER_WORD.match(body[end - 1].value):
+        end -= 1
+    return body[:end]
+
+
+def split_cards(tokens) -> Iterator[CardBlock]:
+    """Group a token stream into one CardBlock per card id, in order"""
+    current = None
+    buffer = []
+    page = None
+    in_header = False
+
+    def finish(body):
+        card_id, name_words = current['id'], current['name']
+        start = name_words[0].pos if name_words else card_id.pos
+        body_start = body[0].pos if body else current['header_end']
+        end = body[-1].end if body else current['header_end']
+        return CardBlock(card_id.value, ' '.join(w.value for w in name_words),
+                         current['types'], current['costs'], body, current['page'],
+                         start, card_id.pos, body_start, end)
+
+    for token in tokens:
+        if in_header:
+            # Type list and "| PC | SC" directly after the id
+            costs = current['costs']
+            if token.kind == TYPE_LIST and not current['types'] and not costs:
+                current['types'] = list(token.value)
+                current['header_end'] = token.end
+                continue
+            if token.kind == COST_SEP and len(costs) < 2:
+                current['header_end'] = token.end
+                continue
+            if token.kind == WORD and token.value.isdigit() and len(costs) < 2:
+                costs.append(int(token.value))
+                current['header_end'] = token.end
+                continue
+            in_header = False
+
+        if token.kind == PAGE:
+            # Cards never run across a page break
+            if current is not None:
+                yield finish(_strip_footer(buffer))
+                current = None
+            buffer = []
+            page = token.value
+        elif token.kind == CARD_ID:
+            name_words = take_name(buffer)
+            if current is not None:
+                yield finish(buffer)
+            current = {'id': token, 'name': name_words, 'types': [], 'costs': [], 'page': page,
+                       'header_end': token.end}
+            buffer = []
+            in_header = True
+        else:
+            buffer.append(token)
+
+    if current is not None:
+        yield finish(_strip_footer(buffer))
+
+
+class StyleBlock(NamedTuple):
+    name: str
+    symbol: str
+    entries: List[Tuple[int, str]]  # (copies, printed card name) per "xN Card Name"
+
+
+def split_styles(tokens) -> Iterator[StyleBlock]:
+    """Yield each "Included Cards" list with the nearest ✦/✧ heading before it.
+
+    Headings can repeat (the style list on the contents pages, running
+    headers); callers decide which blocks to keep.
+    """
+    recent = []  # Words since the last heading symbol, for the heading name
+    heading = None
+    block = None  # Entries of the "Included Cards" block being read
+    entry = None  # [count, name words] of the current "xN Name" entry
+    previous = None
+
+    def finish_block():
+        if entry and entry[1]:
+            block.append((entry[0], ' '.join(entry[1])))
+        if heading and block:
+            return StyleBlock(heading[0], heading[1], block)
+        return None
+
+    for token in tokens:
+        word = token.value if token.kind == WORD else None
+
+        if block is not None:
+            # Reading "x2 Card Name x1 Other Card ..." entries
+            if word and STYLE_COUNT.match(word):
+                if entry and entry[1]:
+                    block.append((entry[0], ' '.join(entry[1])))
+                entry = [int(word[1:]), []]
+                previous = word
+                continue
+            if word and word not in STYLE_SYMBOLS and word not in ('Included', 'STYLE') and entry:
+                entry[1].append(word)
+                previous = word
+                continue
+            style = finish_block()
+            if style:
+                yield style
+            block = None
+            entry = None
+
+        if word in STYLE_SYMBOLS:
+            name_words = take_name(recent)
+            if name_words:
+                heading = (' '.join(w.value for w in name_words), word)
+            recent = []
+        elif word == 'Cards' and previous == 'Included':
+            block = []
+            entry = None
+        elif token.kind == PAGE:
+            recent = []
+        else:
+            recent.append(token)
+            if len(recent) > MAX_NAME_WORDS + 2:
+                del recent[0]
+
+        previous = word
+
+    if block is not None:
+        style = finish_block()
+        if style:
+            yield style
+
+
+def _damage_length(words: List[str]) -> int:
+    """Length of the damage expression at the start of words.
+
+    Damage is either ⸻ or `N [+ ATTR [or ATTR ...]]`; effect text follows
+    it with no header of its own.
+    """
+    if not words:
+        return 0
+    if words[0] == NONE_MARK:
+        return 1
+    if not words[0].isdigit():
+        return 0
+    i = 1
+    if i + 1 < len(words) and words[i] == '+' and words[i + 1] in ATTRIBUTES:
+        i += 2
+        while i + 1 < len(words) and words[i] == 'or' and words[i + 1] in ATTRIBUTES:
+            i += 2
+    return i
+
+
+def collect_sections(body: List[Token]) -> Dict[str, List[str]]:
+    """Split a card body into section word lists.
+
+    Keys: requirements, range, attack, damage, effect, onHit, onBash, pitch.
+    Words are kept as-is (including ⸻); each extractor decides how to
+    render empty sections.
+    """
+    sections = {key: [] for key in ('requirements', 'range', 'attack', 'damage',
+                                    'effect', 'onHit', 'onBash', 'pitch')}
+    current = 'effect'
+    i = 0
+    while i < len(body):
+        token = body[i]
+        i += 1
+        if token.kind == SECTION:
+            current = token.value
+            if current == 'damage':
+                # Read the damage expression, then fall through to effect text
+                j = i
+                words = []
+                while j < len(body) and body[j].kind == WORD and len(words) < 16:
+                    words.append(body[j].value)
+                    j += 1
+                length = _damage_length(words)
+                sections['damage'].extend(words[:length])
+                i += length
+                current = 'effect'
+        elif token.kind == ON_HIT:
+            current = 'onHit'
+        elif token.kind == ON_BASH:
+            current = 'onBash'
+        elif token.kind == PITCH:
+            current = 'pitch'
+        elif token.kind == COST_SEP:
+            # "Attack: D20 + MT | Damage: ..." - the bar only separates fields
+            if current in ('attack', 'range', 'requirements'):
+                current = 'effect'
+        elif token.kind == WORD:
+            sections[current].append(token.value)
+        elif token.kind == TYPE_LIST:
+            sections[current].extend(token.value)
+    return sections
+
+
+def section_text(sections: Dict[str, List[str]], key: str) -> str:
+    """Join a section's words back into text"""
+    return ' '.join(sections[key])
+
+
+def lex_file(path: str) -> Tuple[str, List[Token]]:
+    """Read a text file and return (text, tokens)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return text, list(tokenize(text))
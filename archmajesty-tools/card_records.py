@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Compact immutable records for spell cards, major styles and equipment.
+
+The extractors build cards as plain dicts, which costs a hash table per
+card and a deep copy whenever a list of cards is merged or filtered. These
+records are NamedTuples (like card_lexer's Token and CardBlock): no
+per-instance __dict__, immutable, so lists of them can be shared instead of
+copied, and cheap to build.
+
+All strings are interned, and identical type lists share a single tuple.
+Type names, MT/AG/WL codes, ranges and card names are stored once however
+many cards or compendium versions are loaded, which matters when several
+versions are held in one process for diffing.
+
+Field names mirror the JSON keys (spellCards.json, majorStyles.json,
+equipment.json), so from_dict/to_dict are direct mappings and the JSON the
+scripts write is unchanged.
+"""
+
+import json
+import re
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+ATTRIBUTE_CODES = tuple(sys.intern(code) for code in ('MT', 'AG', 'WL'))
+ATTRIBUTE_PATTERN = re.compile(r'\b(MT|AG|WL)\b')
+
+# Core Rules, Character Creation: a major style costs 2 style points and
+# lists 8 unique cards, a minor style costs 1 and lists 4
+STYLE_COSTS = {'major': 2, 'minor': 1}
+MINOR_STYLE_UNIQUE_CARDS = 4
+
+_type_tuples = {}
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def intern_types(types: Iterable[str]) -> Tuple[str, ...]:
+    """One shared tuple of interned names per distinct type list"""
+    key = tuple(types)
+    shared = _type_tuples.get(key)
+    if shared is None:
+        shared = _type_tuples[key] = tuple(sys.intern(t) for t in key)
+    return shared
+
+
+def attribute_codes(expression: Optional[str]) -> Tuple[str, ...]:
+    """MT/AG/WL codes mentioned in an attack or damage expression, in order"""
+    if not expression:
+        return ()
+    codes = ATTRIBUTE_PATTERN.findall(expression)
+    return tuple(sys.intern(code) for code in dict.fromkeys(codes))
+
+
+class SpellCard(NamedTuple):
+    id: str
+    name: str
+    types: Tuple[str, ...]
+    primaryCost: Optional[int]
+    secondaryCost: Optional[int]
+    requirements: Optional[str] = None
+    range: Optional[str] = None
+    attack: Optional[str] = None
+    damage: Optional[str] = None
+    effect: Optional[str] = None
+    onHit: Optional[str] = None
+    onBash: Optional[str] = None
+    pitchEffect: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, card: Dict) -> 'SpellCard':
+        """Build from an extractor or spellCards.json dict; missing keys become None"""
+        return cls(
+            intern_text(card['id']),
+            intern_text(card.get('name')),
+            intern_types(card.get('types') or ()),
+            card.get('primaryCost'),
+            card.get('secondaryCost'),
+            intern_text(card.get('requirements')),
+            intern_text(card.get('range')),
+            intern_text(card.get('attack')),
+            intern_text(card.get('damage')),
+            intern_text(card.get('effect')),
+            intern_text(card.get('onHit')),
+            intern_text(card.get('onBash')),
+            intern_text(card.get('pitchEffect'))
+        )
+
+    def to_dict(self, omit_none: bool = False) -> Dict:
+        """All keys, as spellCards.json has them; omit_none drops unset ones, like the extractors' dicts"""
+        card = self._asdict()
+        card['types'] = list(self.types)
+        if omit_none:
+            card = {key: value for key, value in card.items() if value is not None}
+        return card
+
+    @property
+    def attack_attributes(self) -> Tuple[str, ...]:
+        return attribute_codes(self.attack)
+
+    @property
+    def damage_attributes(self) -> Tuple[str, ...]:
+        return attribute_codes(self.damage)
+
+
+def style_type(cards: Iterable[str]) -> str:
+    """'major' or 'minor', from how many different cards a style lists"""
+    return 'minor' if len(set(cards)) <= MINOR_STYLE_UNIQUE_CARDS else 'major'
+
+
+class MajorStyle(NamedTuple):
+    name: str
+    cards: Tuple[str, ...]
+    symbol: Optional[str] = None
+    cost: Optional[int] = None
+    id: Optional[str] = None
+    description: Optional[str] = None
+    type: Optional[str] = None  # 'major' or 'minor'
+
+    @property
+    def kind(self) -> str:
+        return self.type or style_type(self.cards)
+
+    @property
+    def points(self) -> int:
+        """Style points the style costs: its own cost, else by its type"""
+        return STYLE_COSTS[self.kind] if self.cost is None else self.cost
+
+    @classmethod
+    def from_dict(cls, style: Dict) -> 'MajorStyle':
+        """Accepts the extractors' 'cards' key or the web app's 'cardList'"""
+        cards = style.get('cards', style.get('cardList')) or ()
+        return cls(
+            intern_text(style['name']),
+            tuple(sys.intern(name) for name in cards),
+            intern_text(style.get('symbol')),
+            style.get('cost'),
+            intern_text(style.get('id')),
+            intern_text(style.get('description')),
+            intern_text(style.get('type'))
+        )
+
+    def to_dict(self) -> Dict:
+        """Only the keys that are set, in the extractors' key order"""
+        style = {'name': self.name}
+        if self.symbol is not None:
+            style['symbol'] = self.symbol
+        style['cards'] = list(self.cards)
+        for key in ('cost', 'id', 'description', 'type'):
+            value = getattr(self, key)
+            if value is not None:
+                style[key] = value
+        return style
+
+
+class Equipment(NamedTuple):
+    id: str
+    name: str
+    type: str
+    slots: Optional[int] = None
+    subtype: Optional[str] = None
+    weaponRange: Optional[str] = None
+    uses: Optional[int] = None
+    effect: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, item: Dict) -> 'Equipment':
+        return cls(
+            intern_text(item['id']),
+            intern_text(item['name']),
+            intern_text(item['type']),
+            item.get('slots'),
+            intern_text(item.get('subtype')),
+            intern_text(item.get('weaponRange')),
+            item.get('uses'),
+            intern_text(item.get('effect'))
+        )
+
+    def to_dict(self) -> Dict:
+        """Drops the optional keys that don't apply (subtype, weaponRange, uses)"""
+        item = {'id': self.id, 'name': self.name, 'type': self.type}
+        for key in ('subtype', 'slots', 'uses', 'weaponRange'):
+            value = getattr(self, key)
+            if value is not None:
+                item[key] = value
+        # Effect is kept even when None, as equipment.json does for bows
+        item['effect'] = self.effect
+        return item
+
+
+def load_cards(path: str) -> List[SpellCard]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [SpellCard.from_dict(card) for card in json.load(f)]
+
+
+def dump_records(records, path: str, indent: Optional[int] = 2) -> None:
+    """Write any list of records as the JSON array the web app loads"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([record.to_dict() for record in records], f, indent=indent, ensure_ascii=False)
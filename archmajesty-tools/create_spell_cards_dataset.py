@@ -3,10 +3,19 @@
 Create a complete spell cards dataset using manual references and extracted data
 """
 
+import argparse
 import json
 import re
 from pathlib import Path
 
+from card_columns import build_columns, save_columns, type_counts
+from card_expressions import EXPRESSIONS_FILE, write_expressions
+from card_facets import FACETS_FILE, write_facets
+from card_records import SpellCard, dump_records
+from data_bundle import DEFAULT_BUNDLE_DIR, SHARD_BY, STYLES_FILE, load_styles, print_summary, write_bundle
+from profiling import add_profile_arguments, profiler
+from search_index import INDEX_FILE, write_search_index
+
 # Manual reference cards with correct structure
 reference_cards = [
     {
@@ -280,42 +289,84 @@ def add_more_sample_cards(cards):
     return cards + additional_cards
 
 def main():
+    parser = argparse.ArgumentParser(description="Build spellCards.json from the reference and extracted cards")
+    parser.add_argument('--bundle', choices=SHARD_BY,
+                        help="Also write the minified, precompressed shard bundle, split per style or id range")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler.configure(args.profile, args.cprofile)
+
+    # Check the styles before anything is written, so a bad --bundle style run leaves the outputs alone
+    styles = []
+    if args.bundle == 'style':
+        try:
+            styles = load_styles(STYLES_FILE)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
     # Start with reference cards
-    all_cards = reference_cards.copy()
+    all_cards = [SpellCard.from_dict(card) for card in reference_cards]
     
     # Add cleaned extracted cards
-    extracted_cards = clean_extracted_cards()
+    with profiler.stage('normalize'):
+        extracted_cards = [SpellCard.from_dict(card) for card in clean_extracted_cards()]
     
     # Merge, avoiding duplicates
-    existing_ids = {card['id'] for card in all_cards}
+    existing_ids = {card.id for card in all_cards}
     for card in extracted_cards:
-        if card['id'] not in existing_ids:
+        if card.id not in existing_ids:
             all_cards.append(card)
     
     # Add more sample cards
-    all_cards = add_more_sample_cards(all_cards)
+    all_cards.extend(SpellCard.from_dict(card) for card in add_more_sample_cards([]))
     
     # Sort by ID
-    all_cards.sort(key=lambda x: x['id'])
+    all_cards.sort(key=lambda card: card.id)
     
     print(f"Total cards in dataset: {len(all_cards)}")
     
     # Save the final dataset
     output_path = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/spellCards.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_cards, f, indent=2, ensure_ascii=False)
+    with profiler.stage('json_write'):
+        dump_records(all_cards, output_path)
     
     print(f"Saved to {output_path}")
     
+    # Columnar copy of the card pool for vectorized analytics
+    columns_path = '/Users/graves/repos/archmajesty_tools/archmajesty-tools/game_analysis/spellCards.columns.npz'
+    with profiler.stage('columns_write'):
+        columns = build_columns(all_cards)
+        save_columns(columns, columns_path)
+    print(f"Saved columns to {columns_path}")
+    
+    # Prebuilt search index so the app doesn't scan every card per keystroke
+    with profiler.stage('search_index_write'):
+        index = write_search_index(all_cards, INDEX_FILE)
+    print(f"Saved search index ({len(index['tokens'])} tokens) to {INDEX_FILE}")
+    
+    # Facet bitsets so filter combinations are bitwise ANDs
+    with profiler.stage('facets_write'):
+        facets = write_facets(columns, FACETS_FILE)
+    print(f"Saved {sum(len(v) for v in facets['facets'].values())} facet bitsets to {FACETS_FILE}")
+    
+    # Attack/damage text compiled to expression trees for the UI and analytics
+    with profiler.stage('expressions_write'):
+        write_expressions(all_cards, EXPRESSIONS_FILE)
+    print(f"Saved compiled attack/damage expressions to {EXPRESSIONS_FILE}")
+    
+    if args.bundle:
+        with profiler.stage('bundle_write'):
+            manifest = write_bundle(all_cards, styles=styles, shard_by=args.bundle)
+        print_summary(manifest, DEFAULT_BUNDLE_DIR)
+    
     # Print summary
-    types_count = {}
-    for card in all_cards:
-        for t in card['types']:
-            types_count[t] = types_count.get(t, 0) + 1
+    types_count = type_counts(columns)
     
     print("\nCard types distribution:")
     for t, count in sorted(types_count.items()):
         print(f"  {t}: {count}")
 
+    profiler.finish('create_spell_cards_dataset')
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Sharded, minified and precompressed spell card bundle for the web app.
+
+Instead of one indented spellCards.json that the app loads whole, cards are
+written as minified JSON shards, either one per major style (keyed by the
+same slug ids the app uses, e.g. 'earthsteel-warrior', with cards that
+belong to no style in id-range shards) or purely by id range. Each shard
+gets .gz and, when the brotli module is installed, .br siblings compressed
+at build time, so the static server can send them as-is.
+
+Cards in a shard leave out unset (null) fields, the same shape the
+extractors write; the app reads a missing key and null the same way.
+
+Shard file names carry a content hash, so they can be cached forever; the
+manifest is the one file to fetch fresh:
+
+    {
+      "version": 1,
+      "shardBy": "style",
+      "shards": [{"key": "earthsteel-warrior", "file": "earthsteel-warrior.3f2a9c1e.json",
+                  "ids": ["#001", ...], "bytes": 4210, "gzipBytes": 1203, "brotliBytes": 1011}, ...],
+      "styles": {"Earthsteel Warrior": "earthsteel-warrior", ...},
+      "byId": {"#001": "earthsteel-warrior", ...}
+    }
+
+A rebuild deletes the shards the previous manifest listed and the new one
+drops; other files in the output directory are left alone.
+
+Usage:
+    python data_bundle.py --shard-by style
+    python data_bundle.py --shard-by range --range-size 40
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from card_records import SpellCard, load_cards
+from extract_spell_cards import normalize_name
+
+BUNDLE_VERSION = 1
+DEFAULT_BUNDLE_DIR = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/public/data/spellCards"
+CARDS_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/spellCards.json"
+STYLES_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/game_data_extracted/major_styles.json"
+DEFAULT_RANGE_SIZE = 50
+SHARD_BY = ('style', 'range')
+SHARD_FILE = re.compile(r'[a-z0-9-]+\.[0-9a-f]{8}\.json')
+
+
+def slugify(name: str) -> str:
+    """'Witch-Queen’s Wiles' -> 'witch-queens-wiles' (the app's style id format)"""
+    name = normalize_name(name).replace("'", '')
+    return re.sub(r'[^a-z0-9]+', '-', name).strip('-')
+
+
+def minify(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def range_shards(cards: List[SpellCard], range_size: int) -> List[Dict]:
+    """Consecutive id ranges of range_size cards, keyed like '001-050'"""
+    cards = sorted(cards, key=lambda card: card.id)
+    shards = []
+    for start in range(0, len(cards), range_size):
+        chunk = cards[start:start + range_size]
+        key = f"{chunk[0].id.lstrip('#')}-{chunk[-1].id.lstrip('#')}"
+        shards.append({'key': key, 'cards': chunk})
+    return shards
+
+
+def style_shards(cards: List[SpellCard], styles: List[Dict], range_size: int) -> List[Dict]:
+    """One shard per major style, plus id-range shards for cards in no style"""
+    by_name = {}
+    for card in cards:
+        by_name.setdefault(normalize_name(card.name or ''), card)
+
+    shards = []
+    assigned = set()
+    for style in styles:
+        members = []
+        for name in dict.fromkeys(style['cards']):
+            card = by_name.get(normalize_name(name))
+            if card is not None:
+                members.append(card)
+                assigned.add(card.id)
+        if members:
+            shards.append({'key': slugify(style['name']), 'style': style['name'], 'cards': members})
+
+    rest = [card for card in cards if card.id not in assigned]
+    for shard in range_shards(rest, range_size):
+        shard['key'] = f"cards-{shard['key']}"
+        shards.append(shard)
+    return shards
+
+
+def write_shard(output_dir: str, key: str, cards: List[SpellCard]) -> Dict:
+    """Write one minified shard plus its compressed siblings; returns its manifest entry"""
+    data = minify([card.to_dict(omit_none=True) for card in cards])
+    digest = hashlib.sha256(data).hexdigest()[:8]
+    filename = f"{key}.{digest}.json"
+    path = os.path.join(output_dir, filename)
+
+    with open(path, 'wb') as f:
+        f.write(data)
+    # mtime=0 keeps the .gz byte-identical between builds of the same shard
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gz_data)
+
+    entry = {'key': key, 'file': filename, 'ids': [card.id for card in cards],
+             'bytes': len(data), 'gzipBytes': len(gz_data)}
+    if brotli is not None:
+        br_data = brotli.compress(data, quality=11)
+        with open(path + '.br', 'wb') as f:
+            f.write(br_data)
+        entry['brotliBytes'] = len(br_data)
+    return entry
+
+
+def load_styles(path: str = STYLES_FILE) -> List[Dict]:
+    """Major styles to shard by; raises ValueError if there are none"""
+    with open(path, 'r', encoding='utf-8') as f:
+        styles = json.load(f)
+    if not styles:
+        raise ValueError(f"{path} has no styles; run extract_spell_cards.py first or shard by range")
+    return styles
+
+
+def previous_shards(output_dir: str) -> List[str]:
+    """Shard files the existing manifest.json in output_dir lists, if any"""
+    try:
+        with open(os.path.join(output_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            return [entry['file'] for entry in json.load(f)['shards']]
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        return []
+
+
+def write_bundle(cards: List, output_dir: str = DEFAULT_BUNDLE_DIR, styles: Optional[List[Dict]] = None,
+                 shard_by: str = 'style', range_size: int = DEFAULT_RANGE_SIZE) -> Dict:
+    """Write the sharded bundle and its manifest; returns the manifest"""
+    cards = [card if isinstance(card, SpellCard) else SpellCard.from_dict(card) for card in cards]
+    if shard_by == 'style':
+        if not styles:
+            # Otherwise every card would quietly land in the id-range fallback shards
+            raise ValueError("Sharding by style needs styles, but none were given; "
+                             "run extract_spell_cards.py to write major_styles.json or use --shard-by range")
+        shards = style_shards(cards, styles or [], range_size)
+    else:
+        shards = range_shards(cards, range_size)
+
+    os.makedirs(output_dir, exist_ok=True)
+    previous = previous_shards(output_dir)
+    manifest = {'version': BUNDLE_VERSION, 'shardBy': shard_by, 'shards': [], 'styles': {}, 'byId': {}}
+    for shard in shards:
+        entry = write_shard(output_dir, shard['key'], shard['cards'])
+        manifest['shards'].append(entry)
+        if 'style' in shard:
+            manifest['styles'][shard['style']] = shard['key']
+        for card_id in entry['ids']:
+            manifest['byId'].setdefault(card_id, shard['key'])
+
+    # Remove shards the previous build listed and this one drops; nothing else in output_dir is touched
+    current = {entry['file'] for entry in manifest['shards']}
+    for filename in previous:
+        if filename in current or not SHARD_FILE.fullmatch(filename):
+            continue
+        for suffix in ('', '.gz', '.br'):
+            try:
+                os.remove(os.path.join(output_dir, filename + suffix))
+            except FileNotFoundError:
+                pass
+
+    manifest_data = minify(manifest)
+    tmp_path = os.path.join(output_dir, 'manifest.json.partial')
+    with open(tmp_path, 'wb') as f:
+        f.write(manifest_data)
+    os.replace(tmp_path, os.path.join(output_dir, 'manifest.json'))
+    return manifest
+
+
+def print_summary(manifest: Dict, output_dir: str) -> None:
+    shards = manifest['shards']
+    total = sum(entry['bytes'] for entry in shards)
+    gz_total = sum(entry['gzipBytes'] for entry in shards)
+    print(f"Wrote {len(shards)} shards to {output_dir}: {total} bytes minified, {gz_total} gzipped", end='')
+    if shards and 'brotliBytes' in shards[0]:
+        print(f", {sum(entry['brotliBytes'] for entry in shards)} brotli")
+    else:
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the sharded, precompressed spell card bundle")
+    parser.add_argument('--cards', default=CARDS_FILE, help="spellCards.json to bundle")
+    parser.add_argument('--styles', default=STYLES_FILE, help="Major styles JSON (for --shard-by style)")
+    parser.add_argument('--shard-by', choices=SHARD_BY, default='style')
+    parser.add_argument('--range-size', type=int, default=DEFAULT_RANGE_SIZE,
+                        help="Cards per id-range shard")
+    parser.add_argument('--output-dir', default=DEFAULT_BUNDLE_DIR)
+    args = parser.parse_args()
+
+    cards = load_cards(args.cards)
+    styles = []
+    if args.shard_by == 'style':
+        try:
+            styles = load_styles(args.styles)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    try:
+        manifest = write_bundle(cards, args.output_dir, styles, args.shard_by, args.range_size)
+    except ValueError as e:
+        parser.error(str(e))
+    print_summary(manifest, args.output_dir)
+
+if __name__ == "__main__":
+    main()
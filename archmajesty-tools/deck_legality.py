@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Batch deck-legality validation.
+
+characterData.json holds the deck building rules (extract_character_data):
+
+    deck_rules.minimum_cards   at least 21 cards
+    deck_rules.max_copies      at most 3 copies of any card
+    style_points               chosen styles cost at most 6 points (major 2, minor 1)
+    artefact_points            chosen artefacts cost at most 2 points
+
+and a card may only be played if one of the deck's styles grants it (the
+style's card list). Styles default to extract_spell_cards.py's
+major_styles.json; majorStyles.json from extract_archmajesty_data.py has
+the same shape.
+
+Decks are validated in bulk rather than one dict count at a time. A batch
+of decks becomes a count matrix (decks x cards), a style selection matrix
+(decks x styles) and an artefact matrix (decks x artefacts), so every rule
+is one array expression over the whole batch:
+
+    counts.sum(axis=1) < minimum_cards
+    (counts > max_copies).any(axis=1)
+    selected @ style_costs > style_points
+    ((counts > 0) & (selected @ grants == 0)).any(axis=1)
+
+Decks use the Character shape the web app stores:
+
+    {"id": "...", "styles": ["earthsteel-warrior", ...], "deck": ["Earthsteel Bash", "#014", ...],
+     "artefacts": ["artefact_1", ...]}
+
+Cards may be given by id or name, styles by id or name, artefacts by id,
+name or as artefact objects.
+
+Usage:
+    python deck_legality.py decks.json
+    python deck_legality.py decks.json --styles src/data/archmajesty/majorStyles.json --json report.json
+"""
+
+import argparse
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from card_records import MajorStyle, load_cards
+from data_bundle import slugify
+from extract_spell_cards import normalize_name
+
+DATA_DIR = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty"
+CARDS_FILE = f"{DATA_DIR}/spellCards.json"
+STYLES_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/game_data_extracted/major_styles.json"
+ARTEFACTS_FILE = f"{DATA_DIR}/artefacts.json"
+CHARACTER_FILE = f"{DATA_DIR}/characterData.json"
+
+RULES = ('unknown', 'too_few_cards', 'too_many_copies', 'style_points', 'artefact_points', 'not_granted')
+
+
+class DeckRules(NamedTuple):
+    minimum_cards: int
+    max_copies: int
+    style_points: int
+    artefact_points: int
+
+    @classmethod
+    def from_character_data(cls, data: Dict) -> 'DeckRules':
+        return cls(
+            data['deck_rules']['minimum_cards'],
+            data['deck_rules']['max_copies'],
+            data['style_points'],
+            data['artefact_points']
+        )
+
+
+class Catalog(NamedTuple):
+    """Everything a deck can reference, with lookup tables from id/name to column"""
+    card_ids: Tuple[str, ...]
+    card_index: Dict[str, int]
+    style_names: Tuple[str, ...]
+    style_index: Dict[str, int]
+    style_costs: np.ndarray     # (styles,)
+    grants: np.ndarray          # (styles x cards) copies of each card a style lists
+    artefact_ids: Tuple[str, ...]
+    artefact_index: Dict[str, int]
+    artefact_costs: np.ndarray  # (artefacts,)
+
+
+class DeckBatch(NamedTuple):
+    deck_ids: List[str]
+    counts: np.ndarray          # (decks x cards) copies of each card
+    selected: np.ndarray        # (decks x styles) bool
+    artefacts: np.ndarray       # (decks x artefacts) copies of each artefact
+    unknown: List[List[str]]    # references per deck that matched nothing in the catalog
+
+
+class Validation(NamedTuple):
+    deck_ids: List[str]
+    violations: Dict[str, np.ndarray]  # rule -> bool per deck
+    deck_sizes: np.ndarray
+    style_points: np.ndarray
+    artefact_points: np.ndarray
+    unknown: List[List[str]]
+
+    @property
+    def legal(self) -> np.ndarray:
+        return ~np.logical_or.reduce([self.violations[rule] for rule in RULES])
+
+    def reasons(self, deck: int) -> List[str]:
+        return [rule for rule in RULES if self.violations[rule][deck]]
+
+
+def build_catalog(cards: List, styles: List[Dict], artefacts: List[Dict]) -> Catalog:
+    card_ids = tuple(card.id for card in cards)
+    card_index = {}
+    # Some ids repeat in spellCards.json; an id refers to its first card, a name to its own card
+    for i, card in enumerate(cards):
+        card_index.setdefault(card.id, i)
+        if card.name:
+            card_index.setdefault(normalize_name(card.name), i)
+
+    styles = [style if isinstance(style, MajorStyle) else MajorStyle.from_dict(style) for style in styles]
+    style_index = {}
+    grants = np.zeros((len(styles), len(cards)), dtype=np.int16)
+    for i, style in enumerate(styles):
+        style_index.setdefault(style.id or slugify(style.name), i)
+        style_index.setdefault(normalize_name(style.name), i)
+        # Card lists repeat a name once per granted copy
+        for name in style.cards:
+            column = card_index.get(normalize_name(name))
+            if column is not None:
+                grants[i, column] += 1
+    # Styles without a cost in the data cost what their type does (MajorStyle.points)
+    style_costs = np.array([s.points for s in styles], dtype=np.int16)
+
+    artefact_index = {}
+    for i, artefact in enumerate(artefacts):
+        artefact_index.setdefault(artefact['id'], i)
+        artefact_index.setdefault(normalize_name(artefact['name']), i)
+    artefact_costs = np.array([artefact.get('cost', 0) for artefact in artefacts], dtype=np.int16)
+
+    return Catalog(card_ids, card_index, tuple(s.name for s in styles), style_index, style_costs, grants,
+                   tuple(a['id'] for a in artefacts), artefact_index, artefact_costs)
+
+
+def _lookup(index: Dict[str, int], ref) -> Optional[int]:
+    if isinstance(ref, dict):
+        ref = ref.get('id') or ref.get('name', '')
+    column = index.get(ref)
+    return column if column is not None else index.get(normalize_name(ref))
+
+
+def _count_matrix(rows: List[int], columns: List[int], shape: Tuple[int, int]) -> np.ndarray:
+    """Count (row, column) pairs into a dense matrix in one bincount"""
+    flat = np.asarray(rows, dtype=np.int64) * shape[1] + np.asarray(columns, dtype=np.int64)
+    return np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape).astype(np.int16)
+
+
+def encode_decks(decks: Iterable[Dict], catalog: Catalog) -> DeckBatch:
+    """Turn stored decks into count matrices over the catalog"""
+    deck_ids, unknown = [], []
+    refs = {'deck': ([], [], catalog.card_index), 'styles': ([], [], catalog.style_index),
+            'artefacts': ([], [], catalog.artefact_index)}
+    for row, deck in enumerate(decks):
+        deck_ids.append(deck.get('id', str(row)))
+        missing = []
+        for key, (rows, columns, index) in refs.items():
+            for ref in deck.get(key) or ():
+                column = _lookup(index, ref)
+                if column is None:
+                    missing.append(ref if isinstance(ref, str) else str(ref.get('id') or ref.get('name')))
+                else:
+                    rows.append(row)
+                    columns.append(column)
+        unknown.append(missing)
+
+    n = len(deck_ids)
+    counts = _count_matrix(*refs['deck'][:2], (n, len(catalog.card_ids)))
+    selected = _count_matrix(*refs['styles'][:2], (n, len(catalog.style_names))) > 0
+    artefacts = _count_matrix(*refs['artefacts'][:2], (n, len(catalog.artefact_ids)))
+    return DeckBatch(deck_ids, counts, selected, artefacts, unknown)
+
+
+def validate_batch(batch: DeckBatch, catalog: Catalog, rules: DeckRules) -> Validation:
+    deck_sizes = batch.counts.sum(axis=1)
+    style_points = batch.selected.astype(np.int16) @ catalog.style_costs
+    artefact_points = batch.artefacts @ catalog.artefact_costs
+    granted = batch.selected.astype(np.int16) @ catalog.grants
+
+    violations = {
+        'unknown': np.array([bool(refs) for refs in batch.unknown], dtype=bool),
+        'too_few_cards': deck_sizes < rules.minimum_cards,
+        'too_many_copies': (batch.counts > rules.max_copies).any(axis=1),
+        'style_points': style_points > rules.style_points,
+        'artefact_points': artefact_points > rules.artefact_points,
+        'not_granted': ((batch.counts > 0) & (granted == 0)).any(axis=1),
+    }
+    return Validation(batch.deck_ids, violations, deck_sizes, style_points, artefact_points, batch.unknown)
+
+
+def validate_decks(decks: Iterable[Dict], catalog: Catalog, rules: DeckRules) -> Validation:
+    return validate_batch(encode_decks(decks, catalog), catalog, rules)
+
+
+def load_styles(path: str = STYLES_FILE) -> List[Dict]:
+    """Style list; raises ValueError if it is empty, since no deck could then be legal"""
+    with open(path, 'r', encoding='utf-8') as f:
+        styles = json.load(f)
+    if not styles:
+        raise ValueError(f"{path} has no styles; run extract_spell_cards.py first or pass --styles")
+    return styles
+
+
+def load_catalog(cards_path: str = CARDS_FILE, styles_path: str = STYLES_FILE,
+                 artefacts_path: str = ARTEFACTS_FILE) -> Catalog:
+    styles = load_styles(styles_path)
+    with open(artefacts_path, 'r', encoding='utf-8') as f:
+        artefacts = json.load(f)
+    return build_catalog(load_cards(cards_path), styles, artefacts)
+
+
+def load_rules(path: str = CHARACTER_FILE) -> DeckRules:
+    with open(path, 'r', encoding='utf-8') as f:
+        return DeckRules.from_character_data(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate stored decks against the deck building rules")
+    parser.add_argument('decks', help="JSON array of decks (Character objects)")
+    parser.add_argument('--cards', default=CARDS_FILE)
+    parser.add_argument('--styles', default=STYLES_FILE)
+    parser.add_argument('--artefacts', default=ARTEFACTS_FILE)
+    parser.add_argument('--rules', default=CHARACTER_FILE, help="characterData.json with the deck rules")
+    parser.add_argument('--json', help="Write a per-deck report to this file")
+    args = parser.parse_args()
+
+    with open(args.decks, 'r', encoding='utf-8') as f:
+        decks = json.load(f)
+    try:
+        catalog = load_catalog(args.cards, args.styles, args.artefacts)
+    except ValueError as e:
+        parser.error(str(e))
+    result = validate_decks(decks, catalog, load_rules(args.rules))
+
+    legal = result.legal
+    print(f"{int(legal.sum())}/{len(legal)} decks legal")
+    for rule in RULES:
+        print(f"  {rule}: {int(result.violations[rule].sum())}")
+
+    if args.json:
+        report = []
+        for i, deck_id in enumerate(result.deck_ids):
+            report.append({
+                'id': deck_id,
+                'legal': bool(legal[i]),
+                'violations': result.reasons(i),
+                'cards': int(result.deck_sizes[i]),
+                'stylePoints': int(result.style_points[i]),
+                'artefactPoints': int(result.artefact_points[i]),
+                'unknown': result.unknown[i]
+            })
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Report saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo draw odds for decks built from major styles.
+
+Each round every mage draws back up to the maximum hand size of seven
+(Core Rules, Draw Step), so by round N a deck has shown
+
+    HAND_SIZE + (N - 1) * played_per_round
+
+cards (capped at the deck size), where played_per_round is how many cards
+leave the hand each round. The engine shuffles many decks x many trials at
+once: trials are rows of a (trials x deck size) array, each shuffled by
+argsorting uniform keys (padding sorts last for smaller decks), so a whole
+chunk of shuffles is one NumPy call. From the draw order it records when
+each card, each primary cost and each requested combo is first seen, and
+turns those into "seen by round N" probabilities.
+
+Decks come from the data extract_archmajesty_data.py writes: either one
+deck per major style combination in majorStyles.json (the style card lists,
+which repeat a name per copy) or stored decks in the Character shape (see
+deck_legality.py).
+
+Usage:
+    python draw_simulation.py --styles-deck "Earthsteel Warrior" "Trickgale Aerialist" "Starseeker Spellsword"
+    python draw_simulation.py --decks decks.json --trials 200000 --rounds 4 --combo "Ars Aeria" "Ars Tempestas"
+"""
+
+import argparse
+import json
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from card_records import load_cards
+from deck_legality import ARTEFACTS_FILE, CARDS_FILE, STYLES_FILE, Catalog, build_catalog, encode_decks, load_styles
+from extract_spell_cards import normalize_name
+
+HAND_SIZE = 7
+DEFAULT_PLAYED_PER_ROUND = 3  # Assumption: a typical combo plus a trick per round
+DEFAULT_ROUNDS = 5
+DEFAULT_TRIALS = 100000
+DEFAULT_SEED = 1337
+CHUNK_ROWS = 65536
+NO_COST = -1
+
+
+class DrawOdds(NamedTuple):
+    deck_ids: List[str]
+    rounds: List[int]           # cards seen by each reported round
+    cards: np.ndarray           # (decks x cards x rounds) P(at least one copy seen)
+    costs: np.ndarray           # (decks x cost labels x rounds) P(a card of that primary cost seen)
+    cost_labels: List[int]
+    combos: np.ndarray          # (decks x combos x rounds) P(every card of the combo seen)
+    trials: int
+
+
+def cards_seen(rounds: int, played_per_round: int, hand_size: int = HAND_SIZE) -> List[int]:
+    return [hand_size + r * played_per_round for r in range(rounds)]
+
+
+def _first_seen(labels: np.ndarray, n_labels: int, depth: int) -> np.ndarray:
+    """Per row, the draw position where each label first appears (depth if never)"""
+    rows = np.arange(len(labels))
+    first = np.full((len(labels), n_labels + 1), depth, dtype=np.int16)
+    # Walk backwards so earlier positions overwrite later ones; label n_labels is padding
+    for position in range(labels.shape[1] - 1, -1, -1):
+        first[rows, labels[:, position]] = position
+    return first[:, :n_labels]
+
+
+def _histogram(first: np.ndarray, deck_rows: np.ndarray, n_decks: int, depth: int) -> np.ndarray:
+    """Count first-seen positions into (decks x labels x depth + 1) with one bincount"""
+    n_labels = first.shape[1]
+    cells = (deck_rows[:, None] * n_labels + np.arange(n_labels)) * (depth + 1) + first
+    hist = np.bincount(cells.ravel(), minlength=n_decks * n_labels * (depth + 1))
+    return hist.reshape(n_decks, n_labels, depth + 1)
+
+
+def simulate(counts: np.ndarray, costs: np.ndarray, seen: Sequence[int], trials: int = DEFAULT_TRIALS,
+             combos: Sequence[Sequence[int]] = (), seed: int = DEFAULT_SEED,
+             deck_ids: Optional[List[str]] = None) -> DrawOdds:
+    """Simulate draws for every deck in a (decks x cards) count matrix.
+
+    costs holds each card column's primary cost (NO_COST for none), seen the
+    number of cards drawn by each reported round, combos lists of card columns.
+    """
+    n_decks, n_columns = counts.shape
+    # Only the cards some deck uses get a label, which keeps the per-trial arrays narrow
+    used = np.flatnonzero(counts.any(axis=0))
+    n_cards = len(used)
+    counts = counts[:, used]
+    costs = np.asarray(costs)[used]
+    sizes = counts.sum(axis=1)
+    width = int(sizes.max()) if n_decks else 0
+    depth = min(max(seen), width)
+
+    # Each deck as a row of card labels, padded with n_cards past its size
+    padded = np.full((n_decks, width), n_cards, dtype=np.int32)
+    for deck in range(n_decks):
+        padded[deck, :sizes[deck]] = np.repeat(np.arange(n_cards), counts[deck])
+    padding = np.arange(width) >= sizes[:, None]
+
+    cost_labels = sorted({int(c) for c in costs if c != NO_COST})
+    cost_of_card = np.full(n_cards + 1, len(cost_labels), dtype=np.int32)
+    for label, cost in enumerate(costs):
+        if cost != NO_COST:
+            cost_of_card[label] = cost_labels.index(int(cost))
+    # A combo card no deck uses gets label n_cards, whose first-seen column is always depth
+    local = {int(column): label for label, column in enumerate(used)}
+    combos = [[local.get(int(column), n_cards) for column in combo] for combo in combos]
+
+    card_hist = np.zeros((n_decks, n_cards, depth + 1), dtype=np.int64)
+    cost_hist = np.zeros((n_decks, len(cost_labels), depth + 1), dtype=np.int64)
+    combo_hist = np.zeros((n_decks, len(combos), depth + 1), dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    total_rows = n_decks * trials
+    for start in range(0, total_rows, CHUNK_ROWS):
+        deck_rows = np.arange(start, min(start + CHUNK_ROWS, total_rows)) // trials
+        keys = rng.random((len(deck_rows), width), dtype=np.float32)
+        keys[padding[deck_rows]] = 2.0
+        order = np.argsort(keys, axis=1)[:, :depth]
+        drawn = padded[deck_rows[:, None], order]
+
+        first = _first_seen(drawn, n_cards, depth)
+        card_hist += _histogram(first, deck_rows, n_decks, depth)
+        cost_hist += _histogram(_first_seen(cost_of_card[drawn], len(cost_labels), depth),
+                                deck_rows, n_decks, depth)
+        if combos:
+            never = np.full((len(first), 1), depth, dtype=first.dtype)
+            first = np.concatenate([first, never], axis=1)
+            combo_first = np.stack([first[:, list(combo)].max(axis=1) for combo in combos], axis=1)
+            combo_hist += _histogram(combo_first, deck_rows, n_decks, depth)
+
+    def by_round(hist: np.ndarray) -> np.ndarray:
+        cumulative = np.cumsum(hist, axis=2) / trials
+        return cumulative[:, :, [min(n, depth) - 1 for n in seen]]
+
+    card_odds = np.zeros((n_decks, n_columns, len(seen)))
+    card_odds[:, used] = by_round(card_hist)
+    return DrawOdds(deck_ids or [str(i) for i in range(n_decks)], list(seen), card_odds,
+                    by_round(cost_hist), cost_labels, by_round(combo_hist), trials)
+
+
+def style_deck(catalog: Catalog, style_refs: Sequence[str]) -> np.ndarray:
+    """Card counts of a deck made of the given styles' card lists"""
+    rows = [catalog.style_index.get(ref, catalog.style_index.get(normalize_name(ref))) for ref in style_refs]
+    missing = [ref for ref, row in zip(style_refs, rows) if row is None]
+    if missing:
+        raise KeyError(f"Unknown styles: {', '.join(missing)}")
+    return catalog.grants[rows].sum(axis=0)
+
+
+def print_odds(odds: DrawOdds, names: List[str], counts: np.ndarray, combo_names: List[str]) -> None:
+    header = ''.join(f"{f'{n} seen':>10}" for n in odds.rounds)
+    for deck, deck_id in enumerate(odds.deck_ids):
+        print(f"\nDeck {deck_id} ({int(counts[deck].sum())} cards, {odds.trials} trials)")
+        print(f"  {'card':32}{header}")
+        for column in np.flatnonzero(counts[deck]):
+            label = f"{names[column]} x{counts[deck, column]}"
+            print(f"  {label:32}" + ''.join(f"{p:10.3f}" for p in odds.cards[deck, column]))
+        print(f"  {'primary cost':32}{header}")
+        for i, cost in enumerate(odds.cost_labels):
+            if odds.costs[deck, i, -1] > 0:
+                print(f"  {str(cost):32}" + ''.join(f"{p:10.3f}" for p in odds.costs[deck, i]))
+        for i, combo in enumerate(combo_names):
+            print(f"  {combo[:32]:32}" + ''.join(f"{p:10.3f}" for p in odds.combos[deck, i]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo draw odds for Archmajesty decks")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--decks', help="JSON array of stored decks (Character objects)")
+    source.add_argument('--styles-deck', nargs='+', metavar='STYLE',
+                        help="Simulate one deck made of these styles' card lists")
+    source.add_argument('--each-style', action='store_true', help="Simulate one deck per major style")
+    parser.add_argument('--cards', default=CARDS_FILE)
+    parser.add_argument('--styles', default=STYLES_FILE)
+    parser.add_argument('--trials', type=int, default=DEFAULT_TRIALS, help="Shuffles per deck")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--played-per-round', type=int, default=DEFAULT_PLAYED_PER_ROUND,
+                        help="Cards that leave the hand each round and are redrawn")
+    parser.add_argument('--combo', nargs='+', action='append', default=[], metavar='CARD',
+                        help="Cards that must all be seen (repeatable)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--json', help="Write the probabilities to this file")
+    args = parser.parse_args()
+
+    cards = load_cards(args.cards)
+    try:
+        styles = load_styles(args.styles)
+    except ValueError as e:
+        parser.error(str(e))
+    with open(ARTEFACTS_FILE, 'r', encoding='utf-8') as f:
+        artefacts = json.load(f)
+    catalog = build_catalog(cards, styles, artefacts)
+
+    if args.decks:
+        with open(args.decks, 'r', encoding='utf-8') as f:
+            batch = encode_decks(json.load(f), catalog)
+        deck_ids, counts = batch.deck_ids, batch.counts
+    elif args.styles_deck:
+        try:
+            counts = style_deck(catalog, args.styles_deck)[None, :]
+        except KeyError as e:
+            parser.error(e.args[0])
+        deck_ids = [' + '.join(args.styles_deck)]
+    else:
+        deck_ids, counts = list(catalog.style_names), catalog.grants.copy()
+
+    combos = []
+    for combo in args.combo:
+        columns = [catalog.card_index.get(normalize_name(name)) for name in combo]
+        if None in columns:
+            parser.error(f"Unknown card in combo: {', '.join(combo)}")
+        combos.append(columns)
+
+    costs = np.array([NO_COST if card.primaryCost is None else card.primaryCost for card in cards])
+    seen = cards_seen(args.rounds, args.played_per_round)
+
+    start = time.perf_counter()
+    odds = simulate(counts, costs, seen, args.trials, combos, args.seed, deck_ids)
+    elapsed = time.perf_counter() - start
+
+    names = [card.name for card in cards]
+    combo_names = [' + '.join(combo) for combo in args.combo]
+    print_odds(odds, names, counts, combo_names)
+    print(f"\n{len(deck_ids) * args.trials} shuffles in {elapsed:.2f}s")
+
+    if args.json:
+        result = []
+        for deck, deck_id in enumerate(odds.deck_ids):
+            result.append({
+                'id': deck_id,
+                'cardsSeen': odds.rounds,
+                'cards': {cards[c].id + ' ' + names[c]: odds.cards[deck, c].round(4).tolist()
+                          for c in np.flatnonzero(counts[deck])},
+                'primaryCosts': {str(cost): odds.costs[deck, i].round(4).tolist()
+                                 for i, cost in enumerate(odds.cost_labels)},
+                'combos': {name: odds.combos[deck, i].round(4).tolist() for i, name in enumerate(combo_names)}
+            })
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
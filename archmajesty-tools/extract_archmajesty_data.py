@@ -4,10 +4,15 @@ Extract Archmajesty game data from PDF text files.
 This script reconstructs the spell cards and game data from the word-per-line PDF extraction.
 """
 
-import re
+import argparse
 import json
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
+
+from card_lexer import TEMPLATE_NAME, Token, collect_sections, section_text, split_cards, split_styles, tokenize
+from card_records import STYLE_COSTS, style_type
+from extract_spell_cards import normalize_name
+from data_bundle import DEFAULT_BUNDLE_DIR, SHARD_BY, print_summary, write_bundle
 
 class ArcmajestyDataExtractor:
     def __init__(self):
@@ -47,211 +52,83 @@ class ArcmajestyDataExtractor:
         
         return '\n'.join(processed_lines)
     
-    def extract_spell_cards(self, text: str) -> List[Dict]:
-        """Extract spell cards from the compendium"""
-        # First, process the text to join words
-        processed = self.process_text(text)
-        lines = processed.split('\n')
-        
+    def extract_spell_cards(self, text: str, tokens: Optional[List[Token]] = None) -> List[Dict]:
+        """Extract spell cards from the compendium.
+
+        Pass tokens from card_lexer.tokenize to reuse an existing scan.
+        """
+        if tokens is None:
+            tokens = tokenize(text)
+
         cards = []
-        i = 0
-        
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Found a card ID
-            if re.match(r'^#\d{3}$', line):
-                card = {'id': line}
-                
-                # Card name is the previous non-empty line
-                j = i - 1
-                while j >= 0 and not lines[j].strip():
-                    j -= 1
-                if j >= 0:
-                    card['name'] = lines[j].strip()
-                
-                # Next line should be types
-                i += 1
-                if i < len(lines):
-                    types_line = lines[i].strip()
-                    card['types'] = [t.strip() for t in types_line.split(',') if t.strip() and t.strip() != '|']
-                
-                # Extract costs (looking for pattern: | XX | YY)
-                i += 1
-                cost_match = None
-                if i < len(lines):
-                    # Look for cost pattern in next few lines
-                    combined = ' '.join(lines[i:i+3])
-                    cost_match = re.search(r'\|\s*(\d+)\s*\|\s*(\d+)', combined)
-                    if cost_match:
-                        card['primaryCost'] = int(cost_match.group(1))
-                        card['secondaryCost'] = int(cost_match.group(2))
-                
-                # Skip to requirements section
-                while i < len(lines) and 'Requirements' not in lines[i]:
-                    i += 1
-                
-                # Parse card sections
-                sections = {}
-                current_section = None
-                section_content = []
-                
-                while i < len(lines):
-                    line = lines[i].strip()
-                    
-                    # Check if we hit next card
-                    if re.match(r'^#\d{3}$', line):
-                        break
-                    
-                    # Check for section headers
-                    if line.startswith('Requirements:'):
-                        if current_section:
-                            sections[current_section] = ' '.join(section_content)
-                        current_section = 'requirements'
-                        section_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-                    elif line.startswith('Range:'):
-                        if current_section:
-                            sections[current_section] = ' '.join(section_content)
-                        current_section = 'range'
-                        section_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-                    elif line.startswith('Attack:'):
-                        if current_section:
-                            sections[current_section] = ' '.join(section_content)
-                        current_section = 'attack'
-                        section_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-                    elif line.startswith('Damage:'):
-                        if current_section:
-                            sections[current_section] = ' '.join(section_content)
-                        current_section = 'damage'
-                        section_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-                    elif line.startswith('[Pitch]') or '[ Pitch ]' in line:
-                        if current_section:
-                            sections[current_section] = ' '.join(section_content)
-                        current_section = 'pitch'
-                        section_content = []
-                    elif line and current_section:
-                        section_content.append(line)
-                    elif line and not current_section:
-                        # This is the main effect text
-                        if 'effect' not in sections:
-                            sections['effect'] = []
-                        sections['effect'].append(line)
-                    
-                    i += 1
-                
-                # Store the last section
-                if current_section and section_content:
-                    sections[current_section] = ' '.join(section_content)
-                
-                # Process sections into card
-                if 'requirements' in sections and sections['requirements'] != '⸻':
-                    card['requirements'] = sections['requirements']
-                
-                card['range'] = sections.get('range', '')
-                
-                if 'attack' in sections and sections['attack'] != '⸻':
-                    card['attack'] = sections['attack']
-                
-                if 'damage' in sections:
-                    card['damage'] = sections['damage']
-                
-                # Process effect text
-                effect_lines = sections.get('effect', [])
-                if isinstance(effect_lines, list):
-                    effect_text = ' '.join(effect_lines)
-                else:
-                    effect_text = effect_lines
-                
-                # Extract special triggers
-                if 'On hit:' in effect_text:
-                    parts = effect_text.split('On hit:', 1)
-                    base_effect = parts[0].strip()
-                    remaining = parts[1]
-                    
-                    if 'On bash:' in remaining:
-                        hit_parts = remaining.split('On bash:', 1)
-                        card['onHit'] = hit_parts[0].strip()
-                        card['onBash'] = hit_parts[1].strip()
-                    else:
-                        card['onHit'] = remaining.strip()
-                    
-                    card['effect'] = base_effect
-                elif 'On bash:' in effect_text:
-                    parts = effect_text.split('On bash:', 1)
-                    card['effect'] = parts[0].strip()
-                    card['onBash'] = parts[1].strip()
-                else:
-                    card['effect'] = effect_text
-                
-                if 'pitch' in sections:
-                    card['pitchEffect'] = sections['pitch']
-                
-                # Only add valid cards
-                if card.get('name') and card['name'] != 'NAME':
-                    cards.append(card)
-                    
-            else:
-                i += 1
-        
+        for block in split_cards(tokens):
+            card = {'id': block.id, 'name': block.name, 'types': block.types}
+
+            if len(block.costs) == 2:
+                card['primaryCost'], card['secondaryCost'] = block.costs
+
+            sections = collect_sections(block.body)
+
+            requirements = section_text(sections, 'requirements')
+            if requirements and requirements != '⸻':
+                card['requirements'] = requirements
+
+            card['range'] = section_text(sections, 'range')
+
+            attack = section_text(sections, 'attack')
+            if attack and attack != '⸻':
+                card['attack'] = attack
+
+            damage = section_text(sections, 'damage')
+            if damage:
+                card['damage'] = damage
+
+            card['effect'] = section_text(sections, 'effect')
+
+            # Extract special triggers
+            if sections['onHit']:
+                card['onHit'] = section_text(sections, 'onHit')
+            if sections['onBash']:
+                card['onBash'] = section_text(sections, 'onBash')
+
+            if sections['pitch']:
+                card['pitchEffect'] = section_text(sections, 'pitch')
+
+            # Only add valid cards
+            if card.get('name') and card['name'] != TEMPLATE_NAME:
+                cards.append(card)
+
         return cards
     
-    def extract_major_styles(self, text: str) -> List[Dict]:
-        """Extract major styles and their associated cards"""
-        processed = self.process_text(text)
-        lines = processed.split('\n')
+    def extract_major_styles(self, text: str, tokens: Optional[List[Token]] = None) -> List[Dict]:
+        """Extract major and minor styles and their card lists.
+
+        Pass tokens from card_lexer.tokenize to reuse an existing scan.
+        """
+        if tokens is None:
+            tokens = tokenize(text)
+
+        # Normalized card name -> printed name, once extract_spell_cards has run
+        known_cards = {normalize_name(card['name']): card['name'] for card in self.cards if card.get('name')}
+
         styles = []
-        
-        # Find style sections
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Look for style pattern: "Name Name ✦"
-            if '✦' in line or '✧' in line:
-                # Extract style name
-                style_name = line.replace('✦', '').replace('✧', '').strip()
-                
-                # Look ahead for "Included Cards" section
-                j = i + 1
-                while j < len(lines) and j < i + 50:
-                    if 'Included Cards' in lines[j]:
-                        # Extract card list
-                        cards = []
-                        k = j + 1
-                        while k < len(lines) and k < j + 20:
-                            card_line = lines[k].strip()
-                            # Look for pattern: "x2 Card Name" or "Card Name x2"
-                            match = re.match(r'x(\d+)\s+(.+)', card_line)
-                            if not match:
-                                match = re.match(r'(.+)\s+x(\d+)', card_line)
-                                if match:
-                                    card_name = match.group(1).strip()
-                                    count = int(match.group(2))
-                                else:
-                                    card_name = None
-                                    count = 0
-                            else:
-                                count = int(match.group(1))
-                                card_name = match.group(2).strip()
-                            
-                            if card_name and count > 0:
-                                for _ in range(count):
-                                    cards.append(card_name)
-                            
-                            k += 1
-                        
-                        if cards:
-                            styles.append({
-                                'name': style_name,
-                                'symbol': '✦' if '✦' in line else '✧',
-                                'cards': cards,
-                                'cost': 2  # Major styles cost 2 points
-                            })
-                        break
-                    j += 1
-            
-            i += 1
-        
+        seen = set()
+        for block in split_styles(tokens):
+            if block.name in seen:
+                continue
+            seen.add(block.name)
+            cards = []
+            for count, name in block.entries:
+                cards.extend([known_cards.get(normalize_name(name), name)] * count)
+            kind = style_type(cards)
+            styles.append({
+                'name': block.name,
+                'symbol': block.symbol,
+                'cards': cards,
+                'cost': STYLE_COSTS[kind],
+                'type': kind
+            })
+
         return styles
     
     def extract_character_data(self, chs_text: str) -> Dict:
@@ -289,6 +166,11 @@ class ArcmajestyDataExtractor:
         return char_data
 
 def main():
+    parser = argparse.ArgumentParser(description="Extract Archmajesty game data from the PDF text files")
+    parser.add_argument('--bundle', choices=SHARD_BY,
+                        help="Also write the minified, precompressed shard bundle, split per style or id range")
+    args = parser.parse_args()
+
     # File paths
     base_dir = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/extracted_text"
     output_dir = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty"
@@ -303,13 +185,18 @@ def main():
     with open(f"{base_dir}/COM_extracted.txt", 'r', encoding='utf-8') as f:
         com_text = f.read()
     
-    cards = extractor.extract_spell_cards(com_text)
+    # Lex the compendium once for both cards and styles
+    com_tokens = list(tokenize(com_text))
+    cards = extractor.extract_spell_cards(com_text, com_tokens)
+    extractor.cards = cards
     print(f"Extracted {len(cards)} spell cards")
     
-    # Extract major styles
-    print("Extracting major styles...")
-    styles = extractor.extract_major_styles(com_text)
-    print(f"Extracted {len(styles)} major styles")
+    # Extract major and minor styles
+    print("Extracting styles...")
+    styles = extractor.extract_major_styles(com_text, com_tokens)
+    print(f"Extracted {len(styles)} styles")
+    if args.bundle == 'style' and not styles:
+        parser.error("--bundle style: no styles found in the compendium text; use --bundle range")
     
     # Extract character data
     print("Extracting character creation data...")
@@ -339,6 +226,10 @@ def main():
     with open(f"{output_dir}/summary.json", 'w', encoding='utf-8') as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
     
+    if args.bundle:
+        manifest = write_bundle(cards, styles=styles, shard_by=args.bundle)
+        print_summary(manifest, DEFAULT_BUNDLE_DIR)
+    
     print("\nData extraction complete!")
     print(f"Files saved to: {output_dir}")
     
@@ -3,10 +3,13 @@
 Extract equipment, items, and artefacts from Archmajesty Core Rulebook
 """
 
+import argparse
 import re
 import json
 from pathlib import Path
 
+from profiling import add_profile_arguments, profiler
+
 def read_text_file(file_path):
     """Read and join text that was split across lines"""
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -186,18 +189,25 @@ def parse_consumables(text):
     return consumables
 
 def main():
+    parser = argparse.ArgumentParser(description="Extract equipment and items from the Core Rulebook text")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler.configure(args.profile, args.cprofile)
+
     # Read the Core Rulebook text
     text_file = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/extracted_text/COR_extracted.txt')
-    text = read_text_file(text_file)
+    with profiler.stage('normalize'):
+        text = read_text_file(text_file)
     
     # Extract equipment section
-    equipment_text = extract_equipment_section(text)
-    
-    # Parse different equipment types
-    weapons = parse_weapons(equipment_text)
-    armor = parse_armor(equipment_text)
-    trinkets = parse_trinkets(equipment_text)
-    consumables = parse_consumables(equipment_text)
+    with profiler.stage('equipment_parse'):
+        equipment_text = extract_equipment_section(text)
+        
+        # Parse different equipment types
+        weapons = parse_weapons(equipment_text)
+        armor = parse_armor(equipment_text)
+        trinkets = parse_trinkets(equipment_text)
+        consumables = parse_consumables(equipment_text)
     
     # Combine all equipment
     all_equipment = {
@@ -210,17 +220,18 @@ def main():
     # Save to JSON files
     output_dir = Path('/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty')
     
-    # Save equipment
-    with open(output_dir / 'equipment.json', 'w', encoding='utf-8') as f:
-        json.dump(weapons + armor + trinkets, f, indent=2, ensure_ascii=False)
-    
-    # Save consumables separately
-    with open(output_dir / 'consumables.json', 'w', encoding='utf-8') as f:
-        json.dump(consumables, f, indent=2, ensure_ascii=False)
-    
-    # Save combined data
-    with open(output_dir / 'allGameItems.json', 'w', encoding='utf-8') as f:
-        json.dump(all_equipment, f, indent=2, ensure_ascii=False)
+    with profiler.stage('json_write'):
+        # Save equipment
+        with open(output_dir / 'equipment.json', 'w', encoding='utf-8') as f:
+            json.dump(weapons + armor + trinkets, f, indent=2, ensure_ascii=False)
+        
+        # Save consumables separately
+        with open(output_dir / 'consumables.json', 'w', encoding='utf-8') as f:
+            json.dump(consumables, f, indent=2, ensure_ascii=False)
+        
+        # Save combined data
+        with open(output_dir / 'allGameItems.json', 'w', encoding='utf-8') as f:
+            json.dump(all_equipment, f, indent=2, ensure_ascii=False)
     
     print(f"Extracted {len(weapons)} weapons")
     print(f"Extracted {len(armor)} armor pieces")
@@ -228,5 +239,7 @@ def main():
     print(f"Extracted {len(consumables)} consumables")
     print(f"Total items: {len(weapons) + len(armor) + len(trinkets) + len(consumables)}")
 
+    profiler.finish('extract_equipment')
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
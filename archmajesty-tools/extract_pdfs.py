@@ -1,30 +1,147 @@
 #!/usr/bin/env python3
 import PyPDF2
+import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_pdf_text(pdf_path, output_path):
+from line_reassembly import extract_page_lines
+from page_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, PageTextCache, file_hash, page_content_key
+from profiling import add_profile_arguments, profiler
+
+# 'words' is PyPDF2's plain extract_text (one word per line);
+# 'lines' rebuilds lines and paragraphs from glyph positions
+LAYOUTS = ('words', 'lines')
+
+DEFAULT_FLUSH_EVERY = 8
+
+class PageWriter:
+    """Write extracted pages to disk as they arrive.
+
+    Each page is written with its --- PAGE N --- marker straight away and
+    the file is flushed every flush_every pages, so memory use stays at one
+    page regardless of book size. Output goes to a temporary file that
+    replaces output_path on a clean close, so a failed run never leaves a
+    half-written book behind.
+    """
+
+    def __init__(self, output_path, flush_every=DEFAULT_FLUSH_EVERY):
+        self.output_path = output_path
+        self.flush_every = flush_every
+        self.tmp_path = f"{output_path}.partial"
+        self.pages_written = 0
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        return self
+
+    def write_page(self, page_num, text):
+        self._file.write(f"\n--- PAGE {page_num + 1} ---\n")
+        self._file.write(text)
+        self.pages_written += 1
+        if self.pages_written % self.flush_every == 0:
+            self._file.flush()
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.output_path)
+        else:
+            os.remove(self.tmp_path)
+        return False
+
+def write_pages(output_path, texts):
+    """Write page texts to a file with --- PAGE N --- markers"""
+    with PageWriter(output_path) as writer:
+        for page_num, text in enumerate(texts):
+            writer.write_page(page_num, text)
+
+def cache_suffix(layout):
+    """Suffix that keeps cache entries for each layout apart"""
+    return '' if layout == 'words' else f"-{layout}"
+
+def read_cached_book(pdf_path, cache, layout='words'):
+    """Look up a whole book in the cache by file hash.
+
+    Returns (book_key, page_keys); page_keys is None unless every page is
+    cached. Use cache.get on each key to stream the text.
+    """
+    book_key = file_hash(pdf_path) + cache_suffix(layout)
+    page_keys = cache.get_book(book_key)
+    if page_keys is None or not all(cache.has(key) for key in page_keys):
+        return book_key, None
+    return book_key, page_keys
+
+def write_cached_book(output_path, page_keys, cache):
+    """Stream a fully cached book to disk one page at a time"""
+    with profiler.stage('cache_read', book=os.path.basename(output_path)):
+        write_pages(output_path, (cache.get(key) for key in page_keys))
+
+def read_page(page, layout='words'):
+    """Extract a single page in the requested layout"""
+    if layout == 'lines':
+        return extract_page_lines(page)
+    return page.extract_text()
+
+def extract_page_text(page, page_num, cache=None, layout='words', memo=None):
+    """Extract one page, going through the cache when one is given.
+
+    memo is shared between pages of one reader so fonts used on many pages
+    are only hashed once for the cache key.
+    Returns (cache_key, text); cache_key is None without a cache.
+    """
+    if cache is None:
+        with profiler.stage('page_extract', page=page_num + 1):
+            return None, read_page(page, layout)
+
+    with profiler.stage('page_cache', page=page_num + 1):
+        key = page_content_key(page, page_num, memo) + cache_suffix(layout)
+        text = cache.get(key)
+    if text is None:
+        with profiler.stage('page_extract', page=page_num + 1):
+            text = read_page(page, layout)
+        cache.put(key, text)
+    return key, text
+
+def extract_pdf_text(pdf_path, output_path, cache=None, layout='words'):
     """Extract text from PDF and save to file"""
     try:
+        if cache is not None:
+            book_key, cached = read_cached_book(pdf_path, cache, layout)
+            if cached is not None:
+                print(f"Processing {pdf_path}: {len(cached)} pages (cached)")
+                write_cached_book(output_path, cached, cache)
+                print(f"Extracted text saved to: {output_path}")
+                return True
+
         with open(pdf_path, 'rb') as file:
-            # Create PDF reader object
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            # Get total number of pages
-            num_pages = len(pdf_reader.pages)
+            with profiler.stage('pdf_open', book=os.path.basename(pdf_path)):
+                # Create PDF reader object
+                pdf_reader = PyPDF2.PdfReader(file)
+                
+                # Get total number of pages
+                num_pages = len(pdf_reader.pages)
             print(f"Processing {pdf_path}: {num_pages} pages")
             
             # Extract text from all pages
             full_text = []
+            page_keys = []
+            memo = {}
             for page_num in range(num_pages):
                 page = pdf_reader.pages[page_num]
-                text = page.extract_text()
+                key, text = extract_page_text(page, page_num, cache, layout, memo)
+                page_keys.append(key)
                 full_text.append(f"\n--- PAGE {page_num + 1} ---\n")
                 full_text.append(text)
+
+            if cache is not None:
+                cache.put_book(book_key, page_keys)
             
             # Save to output file
-            with open(output_path, 'w', encoding='utf-8') as output_file:
-                output_file.write(''.join(full_text))
+            with profiler.stage('text_write', book=os.path.basename(output_path)):
+                with open(output_path, 'w', encoding='utf-8') as output_file:
+                    output_file.write(''.join(full_text))
             
             print(f"Extracted text saved to: {output_path}")
             return True
@@ -33,29 +150,220 @@ def extract_pdf_text(pdf_path, output_path):
         print(f"Error processing {pdf_path}: {str(e)}")
         return False
 
+def extract_pdf_text_streaming(pdf_path, output_path, cache=None, flush_every=DEFAULT_FLUSH_EVERY,
+                               layout='words'):
+    """Extract text from PDF, writing each page to file as soon as it is read"""
+    try:
+        book_key = None
+        if cache is not None:
+            book_key, cached = read_cached_book(pdf_path, cache, layout)
+            if cached is not None:
+                print(f"Processing {pdf_path}: {len(cached)} pages (cached)")
+                write_cached_book(output_path, cached, cache)
+                print(f"Extracted text saved to: {output_path}")
+                return True
+
+        with open(pdf_path, 'rb') as file:
+            with profiler.stage('pdf_open', book=os.path.basename(pdf_path)):
+                pdf_reader = PyPDF2.PdfReader(file)
+                num_pages = len(pdf_reader.pages)
+            print(f"Processing {pdf_path}: {num_pages} pages")
+
+            page_keys = []
+            memo = {}
+            with PageWriter(output_path, flush_every) as writer:
+                for page_num in range(num_pages):
+                    key, text = extract_page_text(pdf_reader.pages[page_num], page_num, cache, layout, memo)
+                    page_keys.append(key)
+                    writer.write_page(page_num, text)
+
+            if cache is not None:
+                cache.put_book(book_key, page_keys)
+
+            print(f"Extracted text saved to: {output_path}")
+            return True
+
+    except Exception as e:
+        print(f"Error processing {pdf_path}: {str(e)}")
+        return False
+
+def count_pages(pdf_path):
+    """Return the number of pages in a PDF"""
+    with profiler.stage('pdf_open', book=os.path.basename(pdf_path)):
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+def extract_page_range(pdf_path, start, end, cache=None, layout='words'):
+    """Extract text for pages [start, end) of a PDF.
+
+    Runs inside a worker process, so it opens its own reader.
+    Returns a list of (page_num, cache_key, text) tuples.
+    """
+    with open(pdf_path, 'rb') as file:
+        with profiler.stage('pdf_open', book=os.path.basename(pdf_path), pages=f"{start + 1}-{end}"):
+            pdf_reader = PyPDF2.PdfReader(file)
+        memo = {}
+        return [(page_num, *extract_page_text(pdf_reader.pages[page_num], page_num, cache, layout, memo))
+                for page_num in range(start, end)]
+
+def _discard_inherited_events():
+    """Pool initializer: a forked worker starts with a copy of the parent's
+    events, which would otherwise be sent back and counted twice"""
+    profiler.drain()
+
+def _extract_page_range_profiled(pdf_path, start, end, cache, layout, profile_dir):
+    """extract_page_range for --profile runs: also returns the worker's stage events"""
+    if not profiler.enabled:
+        profiler.configure(profile_dir)
+    pages = extract_page_range(pdf_path, start, end, cache, layout)
+    return pages, profiler.drain()
+
+def split_page_ranges(num_pages, chunk_size):
+    """Split a page count into consecutive [start, end) ranges"""
+    return [(start, min(start + chunk_size, num_pages))
+            for start in range(0, num_pages, chunk_size)]
+
+def extract_pdfs_parallel(jobs, workers=None, chunk_size=None, cache=None, layout='words'):
+    """Extract several PDFs at once using a process pool.
+
+    jobs is a list of (pdf_path, output_path) tuples. Every book is cut
+    into page ranges and all ranges are submitted to a single pool, so the
+    run takes roughly as long as the slowest chunk. Chunks are written back
+    in page order with the same page markers as extract_pdf_text as soon as
+    every earlier chunk of that book is done, so only out-of-order chunks
+    are held in memory. Books whose file hash is fully cached skip the pool
+    entirely.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    results = {}
+    page_counts = {}
+    book_keys = {}
+    for pdf_path, output_path in jobs:
+        try:
+            if cache is not None:
+                book_keys[pdf_path], cached = read_cached_book(pdf_path, cache, layout)
+                if cached is not None:
+                    print(f"Processing {pdf_path}: {len(cached)} pages (cached)")
+                    write_cached_book(output_path, cached, cache)
+                    print(f"Extracted text saved to: {output_path}")
+                    results[pdf_path] = True
+                    continue
+            page_counts[pdf_path] = count_pages(pdf_path)
+            print(f"Processing {pdf_path}: {page_counts[pdf_path]} pages")
+        except Exception as e:
+            print(f"Error processing {pdf_path}: {str(e)}")
+
+    if chunk_size is None:
+        # Aim for a few chunks per worker so uneven pages balance out
+        total_pages = sum(page_counts.values())
+        chunk_size = max(1, total_pages // (workers * 4))
+
+    initializer = _discard_inherited_events if profiler.enabled else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as executor:
+        futures = {}
+        for pdf_path, count in page_counts.items():
+            if profiler.enabled:
+                futures[pdf_path] = [executor.submit(_extract_page_range_profiled, pdf_path, start, end,
+                                                     cache, layout, profiler.output_dir)
+                                     for start, end in split_page_ranges(count, chunk_size)]
+            else:
+                futures[pdf_path] = [executor.submit(extract_page_range, pdf_path, start, end, cache, layout)
+                                     for start, end in split_page_ranges(count, chunk_size)]
+
+        for pdf_path, output_path in jobs:
+            if pdf_path in results:
+                continue
+            if pdf_path not in page_counts:
+                results[pdf_path] = False
+                continue
+
+            try:
+                page_keys = []
+                with PageWriter(output_path) as writer:
+                    for future in futures[pdf_path]:
+                        pages = future.result()
+                        if profiler.enabled:
+                            pages, events = pages
+                            profiler.merge(events)
+                        for page_num, key, text in pages:
+                            page_keys.append(key)
+                            writer.write_page(page_num, text)
+            except Exception as e:
+                print(f"Error processing {pdf_path}: {str(e)}")
+                results[pdf_path] = False
+                continue
+
+            if cache is not None:
+                cache.put_book(book_keys[pdf_path], page_keys)
+
+            print(f"Extracted text saved to: {output_path}")
+            results[pdf_path] = True
+
+    return results
+
 def main():
+    parser = argparse.ArgumentParser(description="Extract text from the Archmajesty PDFs")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Extract page ranges in a process pool (0 = serial)")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="Pages per worker task (default: balanced across workers)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Directory for the page-level extraction cache")
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Evict least recently used pages above this size")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always re-extract every page")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write each page as soon as it is extracted (bounded memory)")
+    parser.add_argument('--layout', choices=LAYOUTS, default='words',
+                        help="'lines' rebuilds real lines from glyph positions instead of one word per line")
+    parser.add_argument('--flush-every', type=int, default=DEFAULT_FLUSH_EVERY,
+                        help="Pages between flushes in --stream mode")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler.configure(args.profile, args.cprofile)
+
+    cache = None
+    if not args.no_cache:
+        cache = PageTextCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+
     # Define PDF files and their output paths
     pdf_dir = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/public/books"
     output_dir = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/extracted_text"
-    
+
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
-    
+
     pdf_files = {
         "B-COR (AM25).pdf": "COR_extracted.txt",
         "B-COM (AM25).pdf": "COM_extracted.txt",
         "B-CHS (AM25).pdf": "CHS_extracted.txt"
     }
-    
+
     # Extract each PDF
+    jobs = []
     for pdf_name, output_name in pdf_files.items():
         pdf_path = os.path.join(pdf_dir, pdf_name)
         output_path = os.path.join(output_dir, output_name)
-        
+
         if os.path.exists(pdf_path):
-            extract_pdf_text(pdf_path, output_path)
+            jobs.append((pdf_path, output_path))
         else:
             print(f"PDF not found: {pdf_path}")
 
+    if args.workers:
+        extract_pdfs_parallel(jobs, workers=args.workers, chunk_size=args.chunk_size,
+                              cache=cache, layout=args.layout)
+    else:
+        for pdf_path, output_path in jobs:
+            if args.stream:
+                extract_pdf_text_streaming(pdf_path, output_path, cache=cache,
+                                           flush_every=args.flush_every, layout=args.layout)
+            else:
+                extract_pdf_text(pdf_path, output_path, cache=cache, layout=args.layout)
+
+    profiler.finish('extract_pdfs')
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,252 +1,173 @@
 #!/usr/bin/env python3
-import re
+import argparse
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
+
+from card_index import CardIndex, parse_id_ranges
+from parallel_cards import parse_cards_parallel
+from profiling import add_profile_arguments, profiler
+from card_lexer import CardBlock, Token, collect_sections, section_text, split_cards, split_styles, tokenize
+
+LIGATURES = str.maketrans({'ﬁ': 'fi', 'ﬂ': 'fl', 'ﬀ': 'ff', '’': "'"})
+
+
+def normalize_name(name: str) -> str:
+    """Lookup key for card names (ligatures, apostrophes and case folded)"""
+    return ' '.join(name.translate(LIGATURES).lower().split())
+
 
 class SpellCardExtractor:
     def __init__(self):
         self.cards = []
         self.styles = []
         
-    def extract_card_data(self, text: str) -> List[Dict]:
+    def extract_card_data(self, text: str, tokens: Optional[List[Token]] = None) -> List[Dict]:
         """Extract all spell cards from the text"""
-        lines = text.split('\n')
-        i = 0
-        
-        while i < len(lines):
-            # Look for card ID pattern
-            if re.match(r'^#\d{3}$', lines[i].strip()):
-                card = self._extract_single_card(lines, i)
-                if card and card.get('name'):  # Only add if we got a valid name
-                    self.cards.append(card)
-            i += 1
-            
+        if tokens is None:
+            tokens = tokenize(text)
+
+        self.cards.extend(self.extract_blocks(split_cards(tokens)))
         return self.cards
+
+    def extract_blocks(self, blocks: Iterable[CardBlock]) -> List[Dict]:
+        """Build cards from lexed blocks (a full scan or CardIndex.blocks), skipping nameless ones"""
+        cards = []
+        for block in blocks:
+            card = self._extract_single_card(block)
+            if card and card.get('name'):  # Only add if we got a valid name
+                cards.append(card)
+        return cards
     
-    def _extract_single_card(self, lines: List[str], id_index: int) -> Dict:
-        """Extract a single card starting from its ID line"""
+    def _extract_single_card(self, block: CardBlock) -> Dict:
+        """Build a single card from its lexed block"""
         card = {
-            'id': lines[id_index].strip()
+            'id': block.id,
+            'name': block.name
         }
         
-        # Get card name (look backwards for non-empty lines)
-        name_parts = []
-        j = id_index - 1
-        while j >= 0:
-            line = lines[j].strip()
-            if not line:
-                j -= 1
-                continue
-            # Stop if we hit a card effect description or another ID
-            if any(keyword in line for keyword in ['damage', 'counters', 'squares', 'attack', '#']):
-                break
-            # Check if this looks like a card name (title case words)
-            if line and line[0].isupper():
-                name_parts.insert(0, line)
-                j -= 1
-            else:
-                break
-        
-        card['name'] = ' '.join(name_parts)
-        
-        # Extract card properties
-        i = id_index + 1
-        
-        # Get types (next non-empty line after ID)
-        while i < len(lines) and not lines[i].strip():
-            i += 1
-        if i < len(lines):
-            types_line = lines[i].strip()
-            if types_line and not types_line.isdigit():
-                card['types'] = [t.strip() for t in types_line.split(',')]
-                i += 1
-        
-        # Look for cost values (two numbers separated by |)
-        cost_pattern = []
-        while i < len(lines) and len(cost_pattern) < 2:
-            line = lines[i].strip()
-            if line.isdigit():
-                cost_pattern.append(int(line))
-            elif line == '|':
-                pass  # Skip separator
-            elif line and line not in ['|', '']:
-                break  # Hit non-cost content
-            i += 1
-        
-        if len(cost_pattern) >= 2:
-            card['primaryCost'] = cost_pattern[0]
-            card['secondaryCost'] = cost_pattern[1]
+        if block.types:
+            card['types'] = block.types
         
-        # Extract card text sections
-        sections = {
-            'requirements': '',
-            'range': '',
-            'attack': '',
-            'damage': '',
-            'effect': [],
-            'pitch_effect': ''
-        }
-        
-        current_section = None
-        effect_lines = []
+        if len(block.costs) >= 2:
+            card['primaryCost'] = block.costs[0]
+            card['secondaryCost'] = block.costs[1]
         
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Check if we've hit the next card
-            if re.match(r'^#\d{3}$', line):
-                break
-                
-            # Check for section headers
-            if line.lower().startswith('requirements'):
-                current_section = 'requirements'
-                if ':' in line:
-                    sections['requirements'] = line.split(':', 1)[1].strip()
-            elif line.lower().startswith('range'):
-                current_section = 'range'
-                if ':' in line:
-                    sections['range'] = line.split(':', 1)[1].strip()
-            elif line.lower().startswith('attack'):
-                current_section = 'attack'
-                if ':' in line:
-                    sections['attack'] = line.split(':', 1)[1].strip()
-            elif line.lower().startswith('damage'):
-                current_section = 'damage'
-                if ':' in line:
-                    sections['damage'] = line.split(':', 1)[1].strip()
-            elif '[' in line and 'Pitch' in line and ']' in line:
-                # Pitch effect
-                pitch_start = i
-                pitch_lines = []
-                i += 1
-                while i < len(lines) and not re.match(r'^#\d{3}$', lines[i].strip()):
-                    if lines[i].strip():
-                        pitch_lines.append(lines[i].strip())
-                    if '.' in lines[i]:  # End of sentence
-                        break
-                    i += 1
-                sections['pitch_effect'] = ' '.join(pitch_lines)
-                continue
-            elif line and current_section in ['requirements', 'range', 'attack', 'damage']:
-                # Continuation of current section
-                sections[current_section] += ' ' + line
-            elif line:
-                # Main effect text
-                effect_lines.append(line)
-            
-            i += 1
+        sections = collect_sections(block.body)
+        requirements = section_text(sections, 'requirements')
+        attack = section_text(sections, 'attack')
+        damage = section_text(sections, 'damage')
         
         # Process collected data
-        if sections['requirements'] and sections['requirements'] != '⸻':
-            card['requirements'] = sections['requirements']
+        if requirements and requirements != '⸻':
+            card['requirements'] = requirements
         
-        card['range'] = sections['range']
+        card['range'] = section_text(sections, 'range')
         
-        if sections['attack'] and sections['attack'] != '⸻':
-            card['attack'] = sections['attack']
+        if attack and attack != '⸻':
+            card['attack'] = attack
             
-        if sections['damage'] and sections['damage'] != '⸻':
-            card['damage'] = sections['damage']
+        if damage and damage != '⸻':
+            card['damage'] = damage
         
-        # Combine effect lines
-        effect_text = ' '.join(effect_lines)
-        
-        # Extract on hit/bash effects
-        on_hit_match = re.search(r'On hit:(.*?)(?:On bash:|$)', effect_text, re.IGNORECASE | re.DOTALL)
-        on_bash_match = re.search(r'On bash:(.*?)$', effect_text, re.IGNORECASE | re.DOTALL)
-        
-        if on_hit_match:
-            card['onHit'] = on_hit_match.group(1).strip()
-            effect_text = effect_text[:on_hit_match.start()].strip()
+        if sections['onHit']:
+            card['onHit'] = section_text(sections, 'onHit')
             
-        if on_bash_match:
-            card['onBash'] = on_bash_match.group(1).strip()
-            if not on_hit_match:
-                effect_text = effect_text[:on_bash_match.start()].strip()
+        if sections['onBash']:
+            card['onBash'] = section_text(sections, 'onBash')
         
-        card['effect'] = effect_text
+        card['effect'] = section_text(sections, 'effect')
         
-        if sections['pitch_effect']:
-            card['pitchEffect'] = sections['pitch_effect']
+        if sections['pitch']:
+            card['pitchEffect'] = section_text(sections, 'pitch')
         
         return card
     
-    def extract_styles(self, text: str) -> List[Dict]:
-        """Extract major styles and their card lists"""
+    def extract_styles(self, text: str, tokens: Optional[List[Token]] = None) -> List[Dict]:
+        """Extract major styles and their card lists in a single pass.
+
+        Each "Included Cards" block belongs to the nearest ✦/✧ heading before
+        it. Card names are resolved against the already extracted cards
+        through a dict, so the cost stays linear in the text size no matter
+        how many styles there are.
+        """
+        if tokens is None:
+            tokens = tokenize(text)
+
+        # Normalized card name -> printed name, from extract_card_data
+        known_cards = {normalize_name(card['name']): card['name']
+                       for card in self.cards if card.get('name')}
+
         styles = []
-        
-        # Pattern for major styles (Name Name ✦)
-        style_pattern = r'([A-Z][a-z]+)\s+([A-Z][a-z]+)\s+[✦✧]'
-        
-        # Find table of contents section to get all styles
-        if 'TABLE OF CONTENTS' in text:
-            toc_start = text.index('TABLE OF CONTENTS')
-            toc_section = text[toc_start:toc_start + 3000]  # Get a chunk of TOC
-            
-            style_matches = re.finditer(style_pattern, toc_section)
-            for match in style_matches:
-                style_name = f"{match.group(1)} {match.group(2)}"
-                styles.append({
-                    'name': style_name,
-                    'cards': []
-                })
-        
-        # Now find card lists for each style
-        for style in styles:
-            # Look for the style's card list section
-            style_section_pattern = style['name'] + r'.*?Cards.*?x\d+'
-            matches = re.finditer(style_section_pattern, text, re.DOTALL)
-            
-            for match in matches:
-                # Extract cards from this section
-                section = text[match.start():match.start() + 1000]
-                card_pattern = r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+x(\d+)'
-                card_matches = re.finditer(card_pattern, section)
-                
-                for card_match in card_matches:
-                    card_name = card_match.group(1)
-                    count = int(card_match.group(2))
-                    # Skip if it's another style name
-                    if not any(s['name'] in card_name for s in styles):
-                        for _ in range(count):
-                            style['cards'].append(card_name)
-                            
-                if style['cards']:  # Only need first match with cards
-                    break
-        
+        seen = set()
+        for block in split_styles(tokens):
+            if block.name in seen:
+                continue
+            seen.add(block.name)
+            cards = []
+            for count, name in block.entries:
+                cards.extend([known_cards.get(normalize_name(name), name)] * count)
+            styles.append({'name': block.name, 'cards': cards})
+
         return styles
 
 def main():
+    parser = argparse.ArgumentParser(description="Extract spell cards and major styles from the compendium text")
+    parser.add_argument('--ids', help="Only parse these cards, e.g. '#001-#020' or '#005,#137' (prints JSON)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Parse page-aligned shards in a process pool (0 = serial)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler.configure(args.profile, args.cprofile)
+
     # Read the extracted Compendium text
     com_file = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/extracted_text/COM_extracted.txt"
     
-    with open(com_file, 'r', encoding='utf-8') as f:
-        text = f.read()
-    
     extractor = SpellCardExtractor()
     
+    if args.ids:
+        try:
+            ids = parse_id_ranges(args.ids)
+        except ValueError as e:
+            parser.error(str(e))
+        # Seek straight to the requested cards via the offset index
+        index = CardIndex.load_or_build(com_file)
+        cards = extractor.extract_blocks(index.blocks(ids))
+        print(json.dumps(cards, indent=2, ensure_ascii=False))
+        return
+    
+    with profiler.stage('text_read'):
+        with open(com_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+    
     # Extract cards
     print("Extracting spell cards...")
-    cards = extractor.extract_card_data(text)
+    with profiler.stage('card_parse', workers=args.workers):
+        if args.workers:
+            cards = parse_cards_parallel(text, SpellCardExtractor, 'extract_card_data', workers=args.workers)
+            extractor.cards = cards
+        else:
+            cards = extractor.extract_card_data(text)
     print(f"Extracted {len(cards)} cards")
     
     # Extract styles  
     print("\nExtracting major styles...")
-    styles = extractor.extract_styles(text)
+    with profiler.stage('style_parse'):
+        styles = extractor.extract_styles(text)
     print(f"Extracted {len(styles)} styles")
     
     # Save results
     output_dir = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/game_data_extracted"
     os.makedirs(output_dir, exist_ok=True)
     
-    # Save cards
-    with open(f"{output_dir}/spell_cards.json", 'w', encoding='utf-8') as f:
-        json.dump(cards, f, indent=2, ensure_ascii=False)
-    
-    # Save styles
-    with open(f"{output_dir}/major_styles.json", 'w', encoding='utf-8') as f:
-        json.dump(styles, f, indent=2, ensure_ascii=False)
+    with profiler.stage('json_write'):
+        # Save cards
+        with open(f"{output_dir}/spell_cards.json", 'w', encoding='utf-8') as f:
+            json.dump(cards, f, indent=2, ensure_ascii=False)
+        
+        # Save styles
+        with open(f"{output_dir}/major_styles.json", 'w', encoding='utf-8') as f:
+            json.dump(styles, f, indent=2, ensure_ascii=False)
     
     # Print sample card for verification
     if cards:
@@ -259,5 +180,7 @@ def main():
         if card.get('name'):
             print(f"{card['id']}: {card['name']}")
 
+    profiler.finish('extract_spell_cards')
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic Arcane Compendium for scale testing the card extractors.
+
+The real compendium has about 170 cards, which is too small to show
+super-linear behaviour in a parser. This writes any number of cards in the
+same word-per-line layout as extracted_text/COM_extracted.txt (page markers,
+"Major Styles" running headers, ✦ style blocks with Included Abilities and
+Included Cards lists, `#NNN` ids, `Type, Type | PC | SC` headers, section
+labels on their own lines, On hit/On bash/[ Pitch ] effects and ✦ page
+footers), together with a ground-truth JSON of every card and style in the
+same shape as spellCards.json and majorStyles.json.
+
+Output is fully determined by the seed and card count. Card ids are three
+digits like in the book, so past #999 they start again from #001; compare
+against the ground truth by position rather than by id.
+
+Usage:
+    python generate_compendium.py --cards 10000
+    python generate_compendium.py --cards 1000000 --seed 7 --output /tmp/COM_1m.txt
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from typing import Dict, List, Optional, TextIO
+
+SYNTHETIC_DIR = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/benchmarks/synthetic"
+DEFAULT_SEED = 1337
+DEFAULT_CARDS_PER_PAGE = 4
+
+# Each style includes this many different cards; the x2 slots make 10 in total
+STYLE_CARD_COUNTS = (2, 1, 2, 1, 1, 1, 1, 1)
+
+NAME_PREFIXES = (
+    'Earth', 'Storm', 'Star', 'Blight', 'Ward', 'Blade', 'Thunder', 'Daemon', 'Swift', 'Lion',
+    'Battle', 'Wind', 'Tavern', 'Omen', 'Forge', 'Sun', 'Moon', 'Dusk', 'Dawn', 'Frost',
+    'Ember', 'Iron', 'Glimmer', 'Void', 'Prism', 'Thorn', 'Root', 'Cloud', 'Ash', 'Bone',
+    'Gale', 'Soul', 'Flame', 'Mist', 'Shadow', 'Crystal', 'Rune', 'Wild', 'Grave', 'Tide',
+    'Spark', 'Hollow', 'Raven', 'Wolf', 'Oak',
+)
+NAME_SUFFIXES = (
+    'steel', 'fire', 'wind', 'blood', 'light', 'stone', 'crash', 'fang', 'heart', 'rage',
+    'palm', 'quiver', 'forge', 'blast', 'waltz', 'seeker', 'root', 'step', 'shatter', 'rumble',
+    'strike', 'spire', 'bloom', 'shade', 'gleam', 'bane', 'song', 'ward', 'hold', 'veil',
+)
+CARD_NOUNS = (
+    'Bash', 'Rush', 'Strike', 'Grasp', 'Swing', 'Cascade', 'Fracture', 'Aegis', 'Surge', 'Lance',
+    'Volley', 'Shot', 'Curse', 'Flurry', 'Sweep', 'Spiral', 'Dive', 'Blitz', 'Burst', 'Rift',
+    'Torrent', 'Flicker', 'Finale', 'Lunge', 'Flourish', 'Decoy', 'Bolt', 'Barrage', 'Impact', 'Charge',
+    'Overload', 'Edge', 'Slam', 'Dare', 'Gambit', 'Shroud', 'Advance', 'Assault', 'Vortex', 'Jaunt',
+)
+REALMS = (
+    'Void', 'Earth', 'Storm', 'Dawn', 'Abyss', 'Heavens', 'Deep', 'Wilds', 'Forge', 'Tempest',
+    'Empyrean', 'Legion', 'Noctarch', 'Lionheart', 'Frontline', 'Moontide', 'Crucible', 'Horizon', 'Cosmos', 'Grove',
+    'Throne', 'Tides', 'Vale', 'Spire', 'Mire',
+)
+STYLE_ROLES = (
+    'Warrior', 'Aerialist', 'Spellsword', 'Vigilant', 'Duelist', 'Trickster', 'Pyromancer', 'Sentinel', 'Noctarch', 'Banneret',
+    'Champion', 'Adept', 'Taunter', 'Tender', 'Raider', 'Rogue', 'Ranger', 'Knave', 'Artillerist', 'Warden',
+)
+ABILITY_NAMES = (
+    'Terse Technique', 'Power of the Earth', 'Gale Momentum', 'Starlit Focus', 'Warded Stance',
+    'Blade Dance', 'Storm Surge', 'Daemonic Pact', 'Hunter Instinct', 'Blood Frenzy',
+    'Rally the Troops', 'Unyielding Rage', 'Windborne Grace', 'Tavern Bravado', 'Omen Reading',
+)
+
+TYPES = ('Physical', 'Magical', 'Stone', 'Metal', 'Wind', 'Fire', 'Water', 'Light', 'Shadow', 'Nature')
+ELEMENTS = TYPES[2:]
+COSTS = ((15, 5), (10, 10), (10, 5), (15, 10), (20, 10), (20, 0), (5, 5), (25, 15))
+RANGES = (
+    'Melee or Melee Weapon', '3 squares or Melee Weapon', '5 squares or Any Weapon', '5 squares',
+    '4 squares or Ranged Weapon', 'Self', '10 squares', '2 squares or Melee Weapon',
+    '6 squares or Ranged Weapon', '1 square or Melee Weapon', '3 squares',
+)
+REQUIREMENTS = (
+    'Three other cards', 'Two other cards', 'You must be earthbound', 'Three other Green cards',
+    'You must be airborne', 'Four other cards', 'You must have 3+ Swift counters',
+)
+ATTRIBUTES = ('MT', 'AG', 'WL')
+COUNTERS = ('Swift', 'Stun', 'Weaken', 'Empower', 'Expose', 'Surge', 'Burn', 'Guard')
+EFFECTS = (
+    'Attack a single enemy.',
+    'Attack all enemies in a 2 square cone.',
+    'Attack up to two enemies.',
+    'Heal a single ally for {n} HP.',
+    'Move up to {n} squares before attacking.',
+    'You gain {k} {counter} counters.',
+    '[ Trick ] You may play this card out of turn.',
+)
+ON_HIT_EFFECTS = (
+    'Push them 0-2 squares away.',
+    'They gain a {counter} counter.',
+    'They gain {k} {counter} counters.',
+    'You gain {k} {counter} counters.',
+)
+ON_BASH_EFFECTS = (
+    'They suffer an additional {n} + {attr} damage.',
+    'They gain {k} {counter} counters and you gain {k} Empower counters.',
+    'They suffer {n} Magical and {element}-type damage.',
+)
+PITCH_EFFECTS = (
+    'Gain {k} {counter} counters.',
+    'Draw a card.',
+    'Heal yourself for {n} HP.',
+)
+ABILITY_TEXT = (
+    'Passive Whenever you form a combo with only one, two, or three cards, each card in that combo gains a +5/+5 bonus.',
+    'Active Once during your turn you may have a single standard card in your hand gain [ Trick ] until the end of the round.',
+)
+
+
+def name_capacity() -> int:
+    return len(NAME_PREFIXES) * len(NAME_SUFFIXES) * len(CARD_NOUNS) * (len(REALMS) + 1)
+
+
+def style_capacity() -> int:
+    return len(NAME_PREFIXES) * len(NAME_SUFFIXES) * len(STYLE_ROLES) * (len(REALMS) + 1)
+
+
+def _mixed_radix(n: int, *sizes: int) -> List[int]:
+    digits = []
+    for size in sizes:
+        n, digit = divmod(n, size)
+        digits.append(digit)
+    return digits
+
+
+class Permutation:
+    """Visit 0..size-1 in a seeded scrambled order without materializing it"""
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        self.offset = rng.randrange(size)
+        self.stride = rng.randrange(1, size) | 1
+        while math.gcd(self.stride, size) != 1:
+            self.stride += 2
+
+    def __getitem__(self, i: int) -> int:
+        return (i * self.stride + self.offset) % self.size
+
+
+def card_name(n: int) -> str:
+    prefix, suffix, noun, realm = _mixed_radix(n, len(NAME_PREFIXES), len(NAME_SUFFIXES),
+                                               len(CARD_NOUNS), len(REALMS) + 1)
+    name = f"{NAME_PREFIXES[prefix]}{NAME_SUFFIXES[suffix]} {CARD_NOUNS[noun]}"
+    if realm:
+        name += f" of the {REALMS[realm - 1]}"
+    return name
+
+
+def style_name(n: int) -> str:
+    prefix, suffix, role, realm = _mixed_radix(n, len(NAME_PREFIXES), len(NAME_SUFFIXES),
+                                               len(STYLE_ROLES), len(REALMS) + 1)
+    name = f"{NAME_PREFIXES[prefix]}{NAME_SUFFIXES[suffix]} {STYLE_ROLES[role]}"
+    if realm:
+        name += f" of the {REALMS[realm - 1]}"
+    return name
+
+
+def card_id(index: int) -> str:
+    """Three-digit id for the index-th card (0-based), wrapping after #999"""
+    return f"#{index % 999 + 1:03d}"
+
+
+class PageWriter:
+    """Write words in the extract_pdfs.py word-per-line layout"""
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.page = 0
+
+    def new_page(self, header: Optional[str] = 'Major Styles') -> None:
+        if self.page:
+            # Page footer: ornament and page number
+            self.words('✦', str(self.page))
+        self.page += 1
+        self.f.write(f"\n--- PAGE {self.page} ---\n")
+        if header:
+            self.words(*header.split())
+
+    def words(self, *words: str) -> None:
+        for word in words:
+            self.f.write(f"{word}\n \n")
+
+    def text(self, text: str) -> None:
+        self.words(*text.split())
+
+    def label(self, name: str) -> None:
+        """Section label with its colon on its own line ("Range", ":")"""
+        self.f.write(f"{name}\n:\n \n")
+
+    def costs(self, primary: int, secondary: int) -> None:
+        self.f.write(f"|\n \n\u2006\n{primary}\n\u2006\n \n|\n \n\u2006\n{secondary}\n\u2006\n \n")
+
+    def paragraph(self) -> None:
+        self.f.write(" \n")
+
+    def close(self) -> None:
+        if self.page:
+            self.words('✦', str(self.page))
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(n=rng.choice((5, 10, 15, 20)), k=rng.randint(1, 3),
+                           counter=rng.choice(COUNTERS), attr=rng.choice(ATTRIBUTES),
+                           element=rng.choice(ELEMENTS))
+
+
+def random_card(index: int, name: str, rng: random.Random) -> Dict:
+    """Build one ground-truth card in the spellCards.json shape"""
+    types = [rng.choice(('Physical', 'Magical'))] + rng.sample(ELEMENTS, rng.randint(0, 2))
+    primary, secondary = rng.choice(COSTS)
+
+    requirements = rng.choice(REQUIREMENTS) if rng.random() < 0.2 else None
+    auto_hit = rng.random() < 0.4
+    attack = None
+    if not auto_hit:
+        attrs = rng.sample(ATTRIBUTES, rng.randint(1, 2))
+        attack = 'D20 + ' + ' or '.join(attrs)
+
+    damage = '⸻'
+    if rng.random() < 0.8:
+        attrs = rng.sample(ATTRIBUTES, rng.randint(1, 2))
+        damage = f"{rng.choice((2, 5, 7, 8, 10, 12, 15))} + " + ' or '.join(attrs)
+
+    effect = _fill(rng.choice(EFFECTS), rng)
+    if auto_hit:
+        effect = 'Automatically hit a single enemy. ' + effect
+
+    on_hit = _fill(rng.choice(ON_HIT_EFFECTS), rng) if not auto_hit and rng.random() < 0.6 else None
+    on_bash = _fill(rng.choice(ON_BASH_EFFECTS), rng) if rng.random() < 0.4 else None
+    pitch = _fill(rng.choice(PITCH_EFFECTS), rng) if rng.random() < 0.15 else None
+
+    return {
+        'id': card_id(index),
+        'name': name,
+        'types': types,
+        'primaryCost': primary,
+        'secondaryCost': secondary,
+        'requirements': requirements,
+        'range': rng.choice(RANGES),
+        'attack': attack,
+        'damage': damage,
+        'effect': effect,
+        'onHit': on_hit,
+        'onBash': on_bash,
+        'pitchEffect': pitch
+    }
+
+
+def write_card(out: PageWriter, card: Dict) -> None:
+    out.paragraph()
+    out.text(card['name'])
+    out.words(card['id'])
+    out.words(*[t + ',' for t in card['types'][:-1]], card['types'][-1])
+    out.costs(card['primaryCost'], card['secondaryCost'])
+    out.paragraph()
+
+    out.label('Requirements')
+    out.text(card['requirements'] or '⸻')
+    out.label('Range')
+    out.text(card['range'])
+    out.label('Attack')
+    out.text(card['attack'] or '⸻')
+    out.words('|')
+    out.label('Damage')
+    out.text(card['damage'])
+    out.paragraph()
+
+    out.text(card['effect'])
+    if card['onHit']:
+        out.words('On', 'hit')
+        out.f.write(":\n \n")
+        out.text(card['onHit'])
+    if card['onBash']:
+        out.words('On', 'bash')
+        out.f.write(":\n \n")
+        out.text(card['onBash'])
+    if card['pitchEffect']:
+        out.words('|')
+        out.f.write("[\nPitch\n]\n \n")
+        out.text(card['pitchEffect'])
+
+
+def write_style(out: PageWriter, style: Dict, card_names: List[str], abilities: List[str]) -> None:
+    out.new_page()
+    out.text(style['name'])
+    out.words('✦', 'LORE', 'BLURB')
+    out.paragraph()
+    out.text('[Style description]')
+    out.paragraph()
+    out.text('[Synergies with other styles and artefacts]')
+    out.paragraph()
+
+    out.text(style['name'].upper())
+    out.words('Included', 'Abilities')
+    for ability in abilities:
+        out.words('x1')
+        out.text(ability)
+    out.words('Included', 'Cards')
+    for name, count in zip(card_names, STYLE_CARD_COUNTS):
+        out.words(f"x{count}")
+        out.text(name)
+    out.paragraph()
+
+    for ability, text in zip(abilities, ABILITY_TEXT):
+        out.words('✦')
+        out.text(ability)
+        out.words('1', 'slot')
+        out.text(text)
+        out.paragraph()
+
+
+def generate_compendium(output_path: str, truth_path: str, cards: int, seed: int = DEFAULT_SEED,
+                        cards_per_page: int = DEFAULT_CARDS_PER_PAGE) -> Dict:
+    """Write the synthetic compendium text and its ground truth. Returns a summary."""
+    styles = math.ceil(cards / len(STYLE_CARD_COUNTS))
+    if cards > name_capacity() or styles > style_capacity():
+        raise ValueError(f"At most {name_capacity()} cards can be generated with unique names")
+
+    rng = random.Random(seed)
+    card_order = Permutation(name_capacity(), rng)
+    style_order = Permutation(style_capacity(), rng)
+
+    for path in (output_path, truth_path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    style_truth = []
+    index = 0
+    with open(output_path + '.partial', 'w', encoding='utf-8') as text_file, \
+            open(truth_path + '.partial', 'w', encoding='utf-8') as truth_file:
+        out = PageWriter(text_file)
+        out.new_page(header=None)
+        out.text('ARCANE COMPENDIUM, VOL. 1')
+
+        truth_file.write('{"seed": %d, "card_count": %d, "cards": [\n' % (seed, cards))
+        for style_index in range(styles):
+            group = min(len(STYLE_CARD_COUNTS), cards - index)
+            names = [card_name(card_order[index + i]) for i in range(group)]
+            style = {'name': style_name(style_order[style_index]), 'cards': []}
+            for name, count in zip(names, STYLE_CARD_COUNTS):
+                style['cards'].extend([name] * count)
+            write_style(out, style, names, rng.sample(ABILITY_NAMES, 2))
+            style_truth.append(style)
+
+            for i, name in enumerate(names):
+                if i % cards_per_page == 0:
+                    out.new_page()
+                card = random_card(index, name, rng)
+                card['page'] = out.page
+                write_card(out, card)
+                truth_file.write((',\n' if index else '') + json.dumps(card, ensure_ascii=False))
+                index += 1
+
+        out.close()
+        truth_file.write('\n], "styles": ')
+        json.dump(style_truth, truth_file, ensure_ascii=False)
+        truth_file.write('}\n')
+
+    os.replace(output_path + '.partial', output_path)
+    os.replace(truth_path + '.partial', truth_path)
+    return {'cards': index, 'styles': len(style_truth), 'pages': out.page}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic compendium with ground truth")
+    parser.add_argument('--cards', type=int, default=10000, help="Number of cards (default: 10000)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--cards-per-page', type=int, default=DEFAULT_CARDS_PER_PAGE)
+    parser.add_argument('--output', help="Text output path (default: benchmarks/synthetic/COM_synthetic_<cards>.txt)")
+    parser.add_argument('--truth', help="Ground-truth JSON path (default: next to the text, .truth.json)")
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(SYNTHETIC_DIR, f"COM_synthetic_{args.cards}.txt")
+    truth_path = args.truth or os.path.splitext(output_path)[0] + '.truth.json'
+
+    summary = generate_compendium(output_path, truth_path, args.cards, args.seed, args.cards_per_page)
+    print(f"Generated {summary['cards']} cards in {summary['styles']} styles over {summary['pages']} pages")
+    print(f"Text: {output_path}")
+    print(f"Ground truth: {truth_path}")
+
+if __name__ == "__main__":
+    main()
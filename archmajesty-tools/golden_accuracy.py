@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Score every card extractor against the hand-checked golden cards.
+
+The golden set is `reference_cards` from create_spell_cards_dataset.py
+plus `manual_cards` from manual_card_parser.py, all transcribed from the
+PDF. Each extractor is run on COM_extracted.txt, its output is normalized
+to a common shape, and every golden field (name, types, costs, range,
+attack, damage, onHit, onBash, pitchEffect) is compared. Wall time is
+recorded next to the scores, so a parser that gets faster can't quietly
+get worse.
+
+With --truth, a ground-truth file written by generate_compendium.py is
+used instead, matched by position since synthetic ids wrap after #999.
+
+Usage:
+    python golden_accuracy.py
+    python golden_accuracy.py --baseline benchmarks/accuracy-20250101-120000.json
+    python golden_accuracy.py --text-file benchmarks/synthetic/COM_synthetic_10000.txt \
+        --truth benchmarks/synthetic/COM_synthetic_10000.truth.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmark_extractors import BENCH_DIR, COM_FILE, EXTRACTORS, REGRESSION_THRESHOLD, load_parser
+from create_spell_cards_dataset import reference_cards
+from extract_spell_cards import LIGATURES
+from manual_card_parser import manual_cards
+
+FIELDS = ('name', 'types', 'costs', 'range', 'attack', 'damage', 'onHit', 'onBash', 'pitchEffect')
+
+# analyze_game_data.py keeps card sections under their printed labels
+PROPERTY_FIELDS = {'Range': 'range', 'Attack': 'attack', 'Damage': 'damage',
+                   'On hit': 'onHit', 'On bash': 'onBash', 'Pitch': 'pitchEffect'}
+
+
+def golden_cards() -> List[Dict]:
+    """Reference cards, plus any manual cards for ids not already covered"""
+    cards = list(reference_cards)
+    seen = {card['id'] for card in cards}
+    cards.extend(card for card in manual_cards if card['id'] not in seen)
+    return sorted(cards, key=lambda card: card['id'])
+
+
+def normalize_text(value) -> Optional[str]:
+    """Fold whitespace, ligatures and bracket spacing; ⸻ and empty mean no value"""
+    if value is None:
+        return None
+    value = ' '.join(str(value).translate(LIGATURES).split())
+    value = re.sub(r'\[\s*(.*?)\s*\]', r'[\1]', value)
+    if value in ('', '⸻'):
+        return None
+    return value
+
+
+def _int_or_none(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_card(card: Dict) -> Dict:
+    """Map any extractor's card dict onto the scored fields"""
+    fields = dict(card)
+    for label, key in PROPERTY_FIELDS.items():
+        if label in card.get('properties', {}):
+            fields[key] = card['properties'][label]
+
+    primary = fields.get('primaryCost', fields.get('cost1'))
+    secondary = fields.get('secondaryCost', fields.get('cost2'))
+
+    normalized = {
+        'name': normalize_text(fields.get('name')),
+        'types': [normalize_text(t) for t in fields.get('types') or []],
+        'costs': (_int_or_none(primary), _int_or_none(secondary)),
+    }
+    for key in ('range', 'attack', 'damage', 'onHit', 'onBash', 'pitchEffect'):
+        normalized[key] = normalize_text(fields.get(key))
+    return normalized
+
+
+def score(cards: List[Dict], golden: List[Dict], by_position: bool = False) -> Dict:
+    """Field-level accuracy of extracted cards against golden cards"""
+    if by_position:
+        matched = [cards[i] if i < len(cards) else None for i in range(len(golden))]
+    else:
+        by_id = {}
+        for card in cards:
+            by_id.setdefault(card.get('id'), card)
+        matched = [by_id.get(card['id']) for card in golden]
+
+    correct = {field: 0 for field in FIELDS}
+    mismatches = []
+    for expected, actual in zip(golden, matched):
+        expected = normalize_card(expected)
+        actual = normalize_card(actual) if actual is not None else None
+        for field in FIELDS:
+            if actual is not None and actual[field] == expected[field]:
+                correct[field] += 1
+            elif len(mismatches) < 50:
+                mismatches.append({
+                    'name': expected['name'],
+                    'field': field,
+                    'expected': expected[field],
+                    'actual': actual[field] if actual is not None else None
+                })
+
+    total = len(golden) or 1
+    fields = {field: correct[field] / total for field in FIELDS}
+    return {
+        'golden_cards': len(golden),
+        'found_cards': sum(1 for card in matched if card is not None),
+        'fields': fields,
+        'overall': sum(fields.values()) / len(FIELDS),
+        'mismatches': mismatches
+    }
+
+
+def run_extractor(name: str, text: str, golden: List[Dict], by_position: bool, repeat: int) -> Dict:
+    times = []
+    cards = []
+    for _ in range(repeat):
+        parse = load_parser(name)
+        start = time.perf_counter()
+        cards = parse(text)
+        times.append(time.perf_counter() - start)
+
+    result = score(cards, golden, by_position)
+    result.update({'extractor': name, 'cards': len(cards), 'seconds': min(times)})
+    return result
+
+
+def compare_to_baseline(results: List[Dict], baseline_path: str) -> List[str]:
+    """Return a message for every field that lost accuracy or run that got slower"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {r['extractor']: r for r in baseline['results']}
+
+    regressions = []
+    for result in results:
+        old = previous.get(result['extractor'])
+        if not old:
+            continue
+        for field in FIELDS:
+            if result['fields'][field] < old['fields'].get(field, 0):
+                regressions.append(f"{result['extractor']} {field}: "
+                                   f"{old['fields'][field]:.1%} -> {result['fields'][field]:.1%}")
+        ratio = result['seconds'] / (old['seconds'] or 1e-9)
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append(f"{result['extractor']}: {old['seconds']:.4f}s -> "
+                               f"{result['seconds']:.4f}s ({ratio:.2f}x)")
+    return regressions
+
+
+def print_table(results: List[Dict]) -> None:
+    short = {'pitchEffect': 'pitch'}
+    header = ' '.join(f"{short.get(field, field):>7}" for field in FIELDS)
+    print(f"\n{'extractor':<26} {header} {'overall':>8} {'seconds':>8}")
+    for r in results:
+        scores = ' '.join(f"{r['fields'][field]:>7.0%}" for field in FIELDS)
+        print(f"{r['extractor']:<26} {scores} {r['overall']:>8.1%} {r['seconds']:>8.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the card extractors against the golden cards")
+    parser.add_argument('--text-file', default=COM_FILE, help="Compendium text to extract from")
+    parser.add_argument('--truth', help="Ground-truth JSON from generate_compendium.py (matched by position)")
+    parser.add_argument('--extractors', nargs='+', choices=sorted(EXTRACTORS), default=list(EXTRACTORS),
+                        help="Extractors to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per extractor; the fastest is kept")
+    parser.add_argument('--output', help="Results JSON path (default: benchmarks/accuracy-<timestamp>.json)")
+    parser.add_argument('--baseline', help="Earlier results JSON to check for regressions")
+    args = parser.parse_args()
+
+    if args.truth:
+        with open(args.truth, 'r', encoding='utf-8') as f:
+            golden = json.load(f)['cards']
+    else:
+        golden = golden_cards()
+
+    with open(args.text_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    results = []
+    for name in args.extractors:
+        print(f"Scoring {name}...")
+        results.append(run_extractor(name, text, golden, bool(args.truth), args.repeat))
+
+    regressions = compare_to_baseline(results, args.baseline) if args.baseline else []
+    print_table(results)
+
+    output_path = args.output or os.path.join(BENCH_DIR, time.strftime('accuracy-%Y%m%d-%H%M%S.json'))
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'text_file': args.text_file,
+            'truth': args.truth or 'golden',
+            'baseline': args.baseline,
+            'regressions': regressions,
+            'results': results
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to: {output_path}")
+
+    if regressions:
+        print("\nRegressions against baseline:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Rebuild real lines and paragraphs from PyPDF2 glyph positions.
+
+PyPDF2's plain extract_text() puts nearly every word of the Archmajesty
+books on its own line. Here we hook the text visitor instead, which reports
+each text run together with its transformation matrices and font size, and
+glue runs back into lines while the baseline stays put. A large vertical
+jump (relative to the font size) starts a new paragraph, which is written
+as a blank line.
+
+Runs are kept in content-stream order rather than sorted by position, so
+the side-by-side cards on compendium pages don't get interleaved.
+"""
+
+import math
+from typing import List, NamedTuple
+
+# Baseline shift, as a fraction of font size, that still counts as the same line
+SAME_LINE_TOLERANCE = 0.5
+# Vertical gap, as a multiple of font size, that starts a new paragraph
+PARAGRAPH_GAP = 1.8
+
+NO_SPACE_BEFORE = (':', ',', '.', ';', ')', ']', '!', '?')
+NO_SPACE_AFTER = ('(', '[')
+
+
+class TextRun(NamedTuple):
+    x: float
+    y: float
+    size: float
+    text: str
+
+
+def _mult(m, n):
+    """Multiply two PDF 6-element affine matrices"""
+    return [
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    ]
+
+
+def collect_runs(page) -> List[TextRun]:
+    """Collect positioned text runs from a PyPDF2 page via the text visitor"""
+    runs = []
+
+    def visitor(text, cm, tm, font_dict, font_size):
+        text = text.strip()
+        if not text:
+            return
+        matrix = _mult(tm, cm)
+        size = abs(font_size * math.hypot(matrix[2], matrix[3])) or 1.0
+        runs.append(TextRun(matrix[4], matrix[5], size, ' '.join(text.split())))
+
+    page.extract_text(visitor_text=visitor)
+    return runs
+
+
+def _join(left: str, right: str) -> str:
+    if left.endswith(NO_SPACE_AFTER) or right.startswith(NO_SPACE_BEFORE):
+        return left + right
+    return f"{left} {right}"
+
+
+def assemble_lines(runs: List[TextRun]) -> str:
+    """Join text runs into lines, with blank lines between paragraphs"""
+    lines = []
+    current = None
+    line_x = line_y = line_size = 0.0
+
+    for run in runs:
+        if current is not None:
+            dy = line_y - run.y
+            size = max(line_size, run.size)
+            same_line = abs(dy) <= SAME_LINE_TOLERANCE * size and run.x >= line_x
+            if same_line:
+                current = _join(current, run.text)
+                line_x = run.x
+                continue
+
+            lines.append(current)
+            if abs(dy) > PARAGRAPH_GAP * size:
+                lines.append('')
+
+        current = run.text
+        line_x, line_y, line_size = run.x, run.y, run.size
+
+    if current is not None:
+        lines.append(current)
+
+    return '\n'.join(lines)
+
+
+def extract_page_lines(page) -> str:
+    """Extract a page as reassembled lines instead of one word per line"""
+    return assemble_lines(collect_runs(page))
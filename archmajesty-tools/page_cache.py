@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for extracted PDF page text.
+
+Pages are stored under a key built from the hash of the page's content
+stream and resources (fonts with their ToUnicode maps, XObjects) plus its
+page index, so a revised book only misses on the pages whose content
+actually changed. Each book also gets a manifest keyed by
+the hash of the whole PDF file; when that matches, every page can be
+served from the cache without opening the PDF at all.
+
+The cache is bounded by total size and evicts the least recently used
+pages first (file mtimes are bumped on every hit).
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+DEFAULT_CACHE_DIR = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/.extract_cache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def object_digest(obj, memo: Optional[Dict] = None, _active=None) -> bytes:
+    """SHA-256 of a PDF object and everything it references (streams by their data).
+
+    Indirect objects shared between pages, like fonts, are hashed once per
+    memo dict.
+    """
+    memo = {} if memo is None else memo
+    _active = set() if _active is None else _active
+    if isinstance(obj, IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref in memo:
+            return memo[ref]
+        if ref in _active:
+            # A reference cycle; the object is already being hashed further up
+            return f"ref {ref}".encode()
+        _active.add(ref)
+        memo[ref] = object_digest(obj.get_object(), memo, _active)
+        _active.discard(ref)
+        return memo[ref]
+
+    digest = hashlib.sha256(type(obj).__name__.encode())
+    if isinstance(obj, DictionaryObject):
+        for name, value in sorted(obj.items()):
+            if name != '/Parent':
+                digest.update(name.encode())
+                digest.update(object_digest(value, memo, _active))
+        if isinstance(obj, StreamObject):
+            try:
+                digest.update(obj.get_data())
+            except Exception:
+                # Filters PyPDF2 can't decode still hash by their raw bytes
+                digest.update(obj._data)
+    elif isinstance(obj, ArrayObject):
+        for value in obj:
+            digest.update(object_digest(value, memo, _active))
+    else:
+        digest.update(repr(obj).encode())
+    return digest.digest()
+
+
+def page_digest(page, memo: Optional[Dict] = None):
+    """Running SHA-256 of a PyPDF2 page's content stream and /Resources"""
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    resources = page.get('/Resources')
+    if resources is not None:
+        digest.update(object_digest(resources, memo))
+    return digest
+
+
+def page_content_key(page, page_num: int, memo: Optional[Dict] = None) -> str:
+    """Cache key for a PyPDF2 page: content stream and resources hash plus page index"""
+    return f"{page_digest(page, memo).hexdigest()}-{page_num}"
+
+
+class LRUDirCache:
+    """Files stored as <entries_dir>/<key[:2]>/<key><SUFFIX>, bounded by total size.
+
+    Hits bump the file's mtime, and once the files grow past max_bytes the
+    least recently used are deleted first. Subclasses decide what goes in
+    the files.
+    """
+    SUFFIX = ''
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._size = None  # Lazily computed so the object stays cheap to pickle
+
+    @property
+    def entries_dir(self) -> Path:
+        return self.cache_dir
+
+    def path(self, key: str) -> Path:
+        return self.entries_dir / key[:2] / f"{key}{self.SUFFIX}"
+
+    def touch(self, key: str) -> Optional[Path]:
+        """Mark an entry as recently used; returns its path, or None if it is not cached"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def add(self, size: int) -> None:
+        """Account for an entry of size bytes just written, evicting if over the limit"""
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> List[Dict]:
+        entries = []
+        if not self.entries_dir.exists():
+            return entries
+        for path in self.entries_dir.glob(f"*/*{self.SUFFIX}"):
+            # Skip files another process is still writing
+            if '.tmp' in path.name:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append({'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime})
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(entry['size'] for entry in self._entries())
+
+    def evict(self) -> None:
+        """Delete least recently used entries until under max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry['mtime'])
+        total = sum(entry['size'] for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry['path'].unlink()
+            except FileNotFoundError:
+                pass
+            total -= entry['size']
+        self._size = total
+
+
+class PageTextCache(LRUDirCache):
+    SUFFIX = '.txt'
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+    @property
+    def entries_dir(self) -> Path:
+        return self.pages_dir
+
+    @property
+    def pages_dir(self) -> Path:
+        return self.cache_dir / 'pages'
+
+    @property
+    def books_dir(self) -> Path:
+        return self.cache_dir / 'books'
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached page text, or None on a miss"""
+        try:
+            text = self.path(key).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+        self.touch(key)
+        return text
+
+    def has(self, key: str) -> bool:
+        """Check for a cached page without reading it"""
+        return self.path(key).exists()
+
+    def put(self, key: str, text: str) -> None:
+        """Store page text and evict old pages if over the size limit"""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = text.encode('utf-8')
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        self.add(len(data))
+
+    def get_book(self, pdf_hash: str) -> Optional[List[str]]:
+        """Return the page keys recorded for a PDF file hash, if any"""
+        path = self.books_dir / f"{pdf_hash}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['pages']
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def put_book(self, pdf_hash: str, page_keys: List[str]) -> None:
+        """Record the ordered page keys for a PDF file hash"""
+        self.books_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.books_dir / f"{pdf_hash}.json", 'w', encoding='utf-8') as f:
+            json.dump({'pages': page_keys}, f)
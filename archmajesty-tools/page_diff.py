@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Find the pages that changed between two revisions of a book.
+
+Every page is rendered at a low DPI and reduced to two perceptual hashes:
+a pHash (sign of the low-frequency DCT coefficients against their median)
+and a dHash (sign of horizontal brightness gradients), HASH_SIZE^2 bits
+each. Renders happen in a process pool; the hashing itself is a handful of
+NumPy calls over all pages at once, and so is the (old x new) Hamming
+distance matrix used to match pages.
+
+Each page of the new revision is reported as
+  identical  same content stream and resources (analyze_pdf_style.page_render_key)
+  similar    different content, but within --threshold bits of the same page
+  moved      matches a different page of the old revision
+  changed    no match
+  added      no match, past the end of the old revision
+and old pages that nothing matched, and that no changed page took the
+place of, are 'removed'. The report's 'rerun' list (changed + added) is
+what downstream extraction and screenshot jobs need to redo, and 'moved'
+maps new page numbers to old ones for outputs named by page.
+
+Fingerprints are cached by render key, so re-running against an
+unchanged book renders nothing.
+
+Usage:
+    python page_diff.py "old/B-COM (AM25).pdf" compendium --json compendium_diff.json
+"""
+
+import PyPDF2
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+from analyze_pdf_style import BOOKS, page_render_key, render_page_image
+from page_tiles import book_path
+
+FINGERPRINT_DPI = 36
+HASH_SIZE = 16
+# pHash is taken from a DCT of an image this many times larger than the hash
+PHASH_FACTOR = 4
+DEFAULT_THRESHOLD = 8
+CACHE_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/.page_fingerprints.json"
+CACHE_VERSION = 1
+
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16)
+
+
+class PageDiff(NamedTuple):
+    statuses: List[str]          # per new page
+    matches: List[int]           # per new page, the matched 1-based old page (0 if none)
+    distances: List[int]         # per new page, Hamming distance to the matched (or same-numbered) old page
+    removed: List[int]           # 1-based old pages with no counterpart
+
+    def pages(self, *statuses) -> List[int]:
+        return [page for page, status in enumerate(self.statuses, 1) if status in statuses]
+
+
+def fingerprint_page(pdf_path, page_num, dpi=FINGERPRINT_DPI, hash_size=HASH_SIZE):
+    """Worker task: render one page small and return its grayscale pHash and dHash inputs"""
+    image = render_page_image(pdf_path, page_num, dpi).convert('L')
+    phash_side = hash_size * PHASH_FACTOR
+    phash_input = np.asarray(image.resize((phash_side, phash_side), Image.Resampling.LANCZOS), dtype=np.float32)
+    dhash_input = np.asarray(image.resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS), dtype=np.float32)
+    image.close()
+    return phash_input, dhash_input
+
+
+def dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis: dct_matrix(n) @ x is the DCT of x"""
+    k = np.arange(n)[:, None]
+    basis = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    basis[0] /= np.sqrt(2)
+    return basis.astype(np.float32)
+
+
+def phash(images: np.ndarray, hash_size: int = HASH_SIZE) -> np.ndarray:
+    """(pages x N x N) grayscale -> (pages x hash_size^2 / 8) packed pHash bits"""
+    basis = dct_matrix(images.shape[1])
+    low = (basis @ images @ basis.T)[:, :hash_size, :hash_size].reshape(len(images), -1)
+    # The DC term only tracks overall brightness, so it is left out of the median
+    median = np.median(low[:, 1:], axis=1)
+    return np.packbits(low > median[:, None], axis=1)
+
+
+def dhash(images: np.ndarray) -> np.ndarray:
+    """(pages x H x H + 1) grayscale -> (pages x H^2 / 8) packed dHash bits"""
+    bits = images[:, :, 1:] > images[:, :, :-1]
+    return np.packbits(bits.reshape(len(images), -1), axis=1)
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(n x bytes), (m x bytes) packed hashes -> (n x m) differing bit counts"""
+    return POPCOUNT[a[:, None, :] ^ b[None, :, :]].sum(axis=2, dtype=np.int32)
+
+
+def load_cache(path=CACHE_FILE, dpi=FINGERPRINT_DPI, hash_size=HASH_SIZE) -> Dict:
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if (cache.get('version'), cache.get('dpi'), cache.get('hashSize')) == (CACHE_VERSION, dpi, hash_size):
+            return cache
+    return {'version': CACHE_VERSION, 'dpi': dpi, 'hashSize': hash_size, 'fingerprints': {}}
+
+
+def save_cache(cache: Dict, path=CACHE_FILE) -> None:
+    tmp_path = f"{path}.partial"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def page_keys(pdf_path, dpi=FINGERPRINT_DPI) -> List[str]:
+    with open(pdf_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        memo = {}
+        return [page_render_key(page, dpi, memo) for page in reader.pages]
+
+
+def fingerprint_book(pdf_path, keys: List[str], cache: Dict, workers=None, dpi=FINGERPRINT_DPI,
+                     hash_size=HASH_SIZE) -> np.ndarray:
+    """(pages x bytes) packed pHash + dHash of every page, rendering only pages not in the cache"""
+    fingerprints = cache['fingerprints']
+    missing = sorted({key: page_num for page_num, key in enumerate(keys, 1)
+                      if key not in fingerprints}.values())
+    if missing:
+        print(f"Fingerprinting {len(missing)} of {len(keys)} pages of {Path(pdf_path).name}")
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            inputs = list(executor.map(fingerprint_page, [pdf_path] * len(missing), missing,
+                                       [dpi] * len(missing), [hash_size] * len(missing)))
+        hashes = np.concatenate([phash(np.stack([phash_input for phash_input, _ in inputs]), hash_size),
+                                 dhash(np.stack([dhash_input for _, dhash_input in inputs]))], axis=1)
+        for page_num, row in zip(missing, hashes):
+            fingerprints[keys[page_num - 1]] = row.tobytes().hex()
+    return np.array([np.frombuffer(bytes.fromhex(fingerprints[key]), dtype=np.uint8) for key in keys])
+
+
+def diff_pages(old_keys: List[str], new_keys: List[str], old_hashes: np.ndarray, new_hashes: np.ndarray,
+               threshold: int = DEFAULT_THRESHOLD) -> PageDiff:
+    """Classify every new page against the old revision"""
+    distances = hamming(old_hashes, new_hashes)
+    old_by_key = {}
+    for index, key in enumerate(old_keys):
+        old_by_key.setdefault(key, []).append(index)
+
+    statuses, matches, page_distances = [], [], []
+    matched = set()
+    for index, key in enumerate(new_keys):
+        same = old_by_key.get(key, [])
+        if same:
+            # Prefer the same page number when a page's exact content appears more than once
+            match = index if index in same else same[0]
+            status = 'identical' if match == index else 'moved'
+        elif index < len(old_keys) and distances[index, index] <= threshold:
+            match, status = index, 'similar'
+        else:
+            match = int(np.argmin(distances[:, index])) if len(old_keys) else -1
+            if match >= 0 and distances[match, index] <= threshold:
+                status = 'moved'
+            else:
+                match, status = -1, 'changed' if index < len(old_keys) else 'added'
+        if match >= 0:
+            matched.add(match)
+        statuses.append(status)
+        matches.append(match + 1)
+        reference = match if match >= 0 else index
+        page_distances.append(int(distances[reference, index]) if reference < len(old_keys) else -1)
+
+    # An unmatched old page is only 'removed' if no changed page took its place
+    removed = [index + 1 for index in range(len(old_keys)) if index not in matched
+               and (index >= len(new_keys) or matches[index] not in (0, index + 1))]
+    return PageDiff(statuses, matches, page_distances, removed)
+
+
+def diff_books(old_pdf, new_pdf, threshold=DEFAULT_THRESHOLD, workers=None, cache_path=CACHE_FILE,
+               dpi=FINGERPRINT_DPI, hash_size=HASH_SIZE) -> PageDiff:
+    cache = load_cache(cache_path, dpi, hash_size)
+    old_keys, new_keys = page_keys(old_pdf, dpi), page_keys(new_pdf, dpi)
+    old_hashes = fingerprint_book(old_pdf, old_keys, cache, workers, dpi, hash_size)
+    new_hashes = fingerprint_book(new_pdf, new_keys, cache, workers, dpi, hash_size)
+    if cache_path:
+        save_cache(cache, cache_path)
+    return diff_pages(old_keys, new_keys, old_hashes, new_hashes, threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report which pages changed between two revisions of a book")
+    parser.add_argument('old', help=f"Old revision: one of {', '.join(BOOKS)} or a PDF path")
+    parser.add_argument('new', help="New revision: one of the book names or a PDF path")
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f"Max differing bits (of {2 * HASH_SIZE * HASH_SIZE}) for pages to count as the same")
+    parser.add_argument('--workers', type=int, default=0, help="Render processes (0 = one per CPU)")
+    parser.add_argument('--cache', default=CACHE_FILE, help="Fingerprint cache file ('' to disable)")
+    parser.add_argument('--json', help="Write the report to this file")
+    args = parser.parse_args()
+
+    old_pdf, new_pdf = book_path(args.old), book_path(args.new)
+    diff = diff_books(old_pdf, new_pdf, args.threshold, args.workers, args.cache)
+
+    for page, (status, match, distance) in enumerate(zip(diff.statuses, diff.matches, diff.distances), 1):
+        if status == 'moved':
+            print(f"  page {page}: moved from page {match} ({distance} bits)")
+        elif status in ('changed', 'added'):
+            print(f"  page {page}: {status}" + (f" ({distance} bits)" if distance >= 0 else ''))
+    for page in diff.removed:
+        print(f"  old page {page}: removed")
+    counts = {status: diff.statuses.count(status) for status in ('identical', 'similar', 'moved', 'changed', 'added')}
+    print(', '.join(f"{count} {status}" for status, count in counts.items()) + f", {len(diff.removed)} removed")
+
+    if args.json:
+        report = {
+            'old': str(old_pdf),
+            'new': str(new_pdf),
+            'threshold': args.threshold,
+            'pages': [{'page': page, 'status': status, 'oldPage': match or None, 'distance': distance}
+                      for page, (status, match, distance)
+                      in enumerate(zip(diff.statuses, diff.matches, diff.distances), 1)],
+            'removed': diff.removed,
+            'moved': {str(page): diff.matches[page - 1] for page in diff.pages('moved')},
+            'rerun': diff.pages('changed', 'added')
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
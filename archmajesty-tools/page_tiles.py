@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+On-demand page region rendering with a size-capped disk cache.
+
+    png = get_tile('compendium', 12, dpi=300, bbox=(36, 48, 300, 420))
+
+renders only the requested region of a page (bbox in PDF points, origin at
+the top-left, 72 points per inch) by passing a crop window to poppler's
+pdftoppm, so a high-DPI crop of one card doesn't render the whole page.
+Tiles are cached as PNGs keyed by the book's file hash, page, DPI and bbox;
+a repeated lookup is one file read. The cache is a page_cache.LRUDirCache,
+like PageTextCache: least recently used tiles (by mtime, bumped on every
+hit) are evicted once it grows past its size limit.
+
+Usage:
+    python page_tiles.py compendium 12 --dpi 300 --bbox 36 48 300 420 --output card.png
+"""
+
+import PyPDF2
+import argparse
+import hashlib
+import os
+import subprocess
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+from analyze_pdf_style import BOOKS, PDF_DIR
+from page_cache import LRUDirCache, file_hash
+
+DEFAULT_CACHE_DIR = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/.tile_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_DPI = 150
+POINTS_PER_INCH = 72
+
+
+class TileCache(LRUDirCache):
+    SUFFIX = '.png'
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+    def get(self, key: str) -> Optional[Path]:
+        """Path of a cached tile, or None on a miss"""
+        return self.touch(key)
+
+
+_default_cache = None
+
+
+def default_cache() -> TileCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TileCache()
+    return _default_cache
+
+
+def book_path(book: str) -> Path:
+    """A book name from BOOKS ('compendium') or a path to any PDF"""
+    return PDF_DIR / BOOKS[book] if book in BOOKS else Path(book)
+
+
+@lru_cache(maxsize=32)
+def _book_hash(path: str, size: int, mtime_ns: int) -> str:
+    return file_hash(path)
+
+
+def book_hash(path: Path) -> str:
+    """File hash, computed once per version of the file in this process"""
+    stat = path.stat()
+    return _book_hash(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _page_count(path: str, size: int, mtime_ns: int) -> int:
+    with open(path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def page_count(path: Path) -> int:
+    """Number of pages, read once per version of the file in this process"""
+    stat = path.stat()
+    return _page_count(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def tile_key(pdf_hash: str, page: int, dpi: int, bbox: Optional[Sequence[float]]) -> str:
+    region = 'page' if bbox is None else ','.join(f"{value:g}" for value in bbox)
+    return hashlib.sha256(f"{pdf_hash}:{page}:{dpi}:{region}".encode()).hexdigest()
+
+
+def render_region(pdf_path: Path, page: int, dpi: int, bbox: Optional[Sequence[float]], output: Path) -> None:
+    """Render a 1-based page, or just the bbox region of it, to a PNG with pdftoppm"""
+    command = ['pdftoppm', '-png', '-singlefile', '-r', str(dpi), '-f', str(page), '-l', str(page)]
+    if bbox is not None:
+        x0, y0, x1, y1 = (round(value * dpi / POINTS_PER_INCH) for value in bbox)
+        command += ['-x', str(x0), '-y', str(y0), '-W', str(x1 - x0), '-H', str(y1 - y0)]
+    # pdftoppm appends the extension to the output root
+    command += [str(pdf_path), str(output.with_suffix(''))]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+    except FileNotFoundError:
+        raise RuntimeError("pdftoppm not found. Please install poppler: brew install poppler")
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode('utf-8', 'replace').strip()
+        raise RuntimeError(f"pdftoppm failed on {pdf_path} page {page}: {stderr or f'exit status {e.returncode}'}")
+
+
+def get_tile_path(book: str, page: int, dpi: int = DEFAULT_DPI, bbox: Optional[Sequence[float]] = None,
+                  cache: Optional[TileCache] = None) -> Path:
+    """Cached PNG of a page region (bbox = x0, y0, x1, y1 in points), rendering it on a miss"""
+    if bbox is not None and (bbox[2] <= bbox[0] or bbox[3] <= bbox[1]):
+        raise ValueError(f"Empty tile bbox: {tuple(bbox)!r}")
+    cache = cache or default_cache()
+    pdf_path = book_path(book)
+    if not pdf_path.is_file():
+        raise FileNotFoundError(f"No such book or PDF: {book!r} (books: {', '.join(BOOKS)})")
+    pages = page_count(pdf_path)
+    if not 1 <= page <= pages:
+        raise ValueError(f"Page {page} out of range: {pdf_path.name} has {pages} pages")
+    key = tile_key(book_hash(pdf_path), page, dpi, bbox)
+
+    path = cache.get(key)
+    if path is not None:
+        return path
+
+    path = cache.path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp.png")
+    try:
+        render_region(pdf_path, page, dpi, bbox, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        # Only left behind when the render failed
+        tmp_path.unlink(missing_ok=True)
+    cache.add(path.stat().st_size)
+    return path
+
+
+def get_tile(book: str, page: int, dpi: int = DEFAULT_DPI, bbox: Optional[Sequence[float]] = None,
+             cache: Optional[TileCache] = None) -> bytes:
+    """PNG bytes of a page region; see get_tile_path"""
+    return get_tile_path(book, page, dpi, bbox, cache).read_bytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render (or fetch from cache) a region of a book page")
+    parser.add_argument('book', help=f"One of {', '.join(BOOKS)} or a PDF path")
+    parser.add_argument('page', type=int, help="1-based page number")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--bbox', type=float, nargs=4, metavar=('X0', 'Y0', 'X1', 'Y1'),
+                        help="Region in PDF points from the top-left corner (default: whole page)")
+    parser.add_argument('--output', help="Copy the tile here")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    args = parser.parse_args()
+
+    cache = TileCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    start = time.perf_counter()
+    try:
+        data = get_tile(args.book, args.page, args.dpi, args.bbox, cache)
+    except (FileNotFoundError, ValueError, RuntimeError) as e:
+        parser.error(str(e))
+    print(f"{len(data)} bytes in {(time.perf_counter() - start) * 1000:.1f} ms")
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(data)
+        print(f"Saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
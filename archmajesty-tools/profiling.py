@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling shared by the extraction scripts.
+
+Scripts wrap their stages (PDF open, per-page extraction, text
+normalization, card parsing, style parsing, JSON serialization) in
+`profiler.stage(...)`. Unless `--profile` is given this does nothing beyond
+a flag check. With it, each stage records wall and CPU time and at the end
+of the run three files are written to the profile directory:
+
+    <script>-<time>.stages.json   wall/CPU totals per stage
+    <script>-<time>.trace.json    Chrome trace (chrome://tracing or ui.perfetto.dev)
+    <script>-<time>.prof          cProfile dump, only with --cprofile
+
+Trace timestamps are wall-clock based, so events recorded in worker
+processes (see `drain`/`merge`) line up with the parent's.
+
+Usage in a script:
+    from profiling import add_profile_arguments, profiler
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler.configure(args.profile, args.cprofile)
+    with profiler.stage('card_parse'):
+        cards = extract(text)
+    profiler.finish('extract_cards_final')
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+DEFAULT_PROFILE_DIR = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/profiles"
+
+
+def add_profile_arguments(parser) -> None:
+    """Add --profile [DIR] and --cprofile to an argparse parser"""
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_DIR, default=None, metavar='DIR',
+                        help="Write a per-stage timing breakdown and Chrome trace (default dir: profiles/)")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="With --profile, also write a cProfile dump of the whole run")
+
+
+class StageProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.output_dir = None
+        self.events = []
+        self._cprofile = None
+        self._started = None
+
+    def configure(self, output_dir: Optional[str], cprofile: bool = False) -> None:
+        """Turn profiling on when output_dir is set (i.e. --profile was given)"""
+        if not output_dir:
+            return
+        self.enabled = True
+        self.output_dir = output_dir
+        self._started = time.time()
+        if cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextmanager
+    def stage(self, name: str, **args):
+        """Time a block as one stage; extra keyword args end up in the trace"""
+        if not self.enabled:
+            yield
+            return
+        start_ts = time.time()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.events.append({
+                'name': name,
+                'ts': start_ts,
+                'wall': time.perf_counter() - start_wall,
+                'cpu': time.process_time() - start_cpu,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args
+            })
+
+    def drain(self) -> List[Dict]:
+        """Hand over the events recorded so far (used to ship them out of a worker)"""
+        events, self.events = self.events, []
+        return events
+
+    def merge(self, events: List[Dict]) -> None:
+        """Add events recorded in a worker process"""
+        self.events.extend(events)
+
+    def summary(self) -> Dict[str, Dict]:
+        stages = {}
+        for event in self.events:
+            stage = stages.setdefault(event['name'], {'count': 0, 'wall': 0.0, 'cpu': 0.0})
+            stage['count'] += 1
+            stage['wall'] += event['wall']
+            stage['cpu'] += event['cpu']
+        return stages
+
+    def chrome_trace(self) -> Dict:
+        """Complete ('X') events in the Chrome trace event format"""
+        trace = []
+        for event in self.events:
+            trace.append({
+                'name': event['name'],
+                'cat': 'stage',
+                'ph': 'X',
+                'ts': event['ts'] * 1e6,
+                'dur': event['wall'] * 1e6,
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': dict(event['args'], cpu_ms=event['cpu'] * 1e3)
+            })
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def finish(self, script_name: str) -> None:
+        """Write the stage breakdown, trace and cProfile dump, and print the breakdown"""
+        if not self.enabled:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{script_name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        stages = self.summary()
+        total_wall = time.time() - self._started
+
+        with open(f"{base}.stages.json", 'w', encoding='utf-8') as f:
+            json.dump({'script': script_name, 'total_wall': total_wall, 'stages': stages}, f, indent=2)
+        with open(f"{base}.trace.json", 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(f"{base}.prof")
+
+        print(f"\nProfile ({total_wall:.3f}s total):")
+        print(f"  {'stage':<20} {'count':>6} {'wall (s)':>10} {'cpu (s)':>10}")
+        for name, stage in sorted(stages.items(), key=lambda item: -item[1]['wall']):
+            print(f"  {name:<20} {stage['count']:>6} {stage['wall']:>10.4f} {stage['cpu']:>10.4f}")
+        print(f"Profile written to: {base}.*")
+
+
+# Shared by every script in a process; stays disabled unless configured
+profiler = StageProfiler()
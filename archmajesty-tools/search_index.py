@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Build-time inverted search index over spell card text.
+
+The web app's card search lowercases and scans every card on each
+keystroke. Instead, the build writes searchIndex.json next to
+spellCards.json:
+
+    {
+      "version": 1,
+      "fields": ["name", "effect", "onHit", "onBash", "pitchEffect"],
+      "ids": ["#001", ...],            doc number -> card id (position in spellCards.json)
+      "tokens": ["0", "1", "a", ...],  sorted, normalized tokens
+      "prefixes": {"ea": [120, 131], ...},
+                                       first PREFIX_LENGTH chars -> [lo, hi) slice of tokens
+      "postings": [[3, 1, 2, 6, ...], ...]
+                                       per token: (doc delta, field bitmask) pairs
+    }
+
+Tokens are lowercased, ligature-folded runs of letters and digits. The
+field bitmask has bit i set when the token occurs in fields[i], so a match
+in the name (bit 0) can be ranked first. search() below is the reference
+for how the front end should query it: every word must match, the last
+one as a prefix.
+"""
+
+import argparse
+import json
+import re
+from bisect import bisect_left
+from typing import Dict, List
+
+from card_records import load_cards
+from extract_spell_cards import LIGATURES
+
+INDEX_VERSION = 1
+FIELDS = ('name', 'effect', 'onHit', 'onBash', 'pitchEffect')
+PREFIX_LENGTH = 2
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+CARDS_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/spellCards.json"
+INDEX_FILE = "/Users/graves/repos/archmajesty_tools/archmajesty-tools/src/data/archmajesty/searchIndex.json"
+
+
+def normalize_tokens(text: str) -> List[str]:
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.translate(LIGATURES).lower().replace("'", ''))
+
+
+def build_search_index(cards: List) -> Dict:
+    """Build the index from SpellCard records (or anything with the FIELDS attributes)"""
+    masks = {}  # token -> {doc: field bitmask}
+    for doc, card in enumerate(cards):
+        for bit, field in enumerate(FIELDS):
+            for token in normalize_tokens(getattr(card, field)):
+                docs = masks.setdefault(token, {})
+                docs[doc] = docs.get(doc, 0) | (1 << bit)
+
+    tokens = sorted(masks)
+    postings = []
+    for token in tokens:
+        flat = []
+        previous = 0
+        for doc in sorted(masks[token]):
+            flat.extend((doc - previous, masks[token][doc]))
+            previous = doc
+        postings.append(flat)
+
+    prefixes = {}
+    for i, token in enumerate(tokens):
+        prefix = token[:PREFIX_LENGTH]
+        if prefix not in prefixes:
+            prefixes[prefix] = [i, i + 1]
+        else:
+            prefixes[prefix][1] = i + 1
+
+    return {
+        'version': INDEX_VERSION,
+        'fields': list(FIELDS),
+        'ids': [card.id for card in cards],
+        'tokens': tokens,
+        'prefixes': prefixes,
+        'postings': postings
+    }
+
+
+def _docs_for(index: Dict, token_ids) -> Dict[int, int]:
+    """Union of postings for the given tokens: doc -> field bitmask"""
+    docs = {}
+    for token_id in token_ids:
+        flat = index['postings'][token_id]
+        doc = 0
+        for i in range(0, len(flat), 2):
+            doc += flat[i]
+            docs[doc] = docs.get(doc, 0) | flat[i + 1]
+    return docs
+
+
+def _prefix_token_ids(index: Dict, prefix: str) -> range:
+    tokens = index['tokens']
+    if len(prefix) < PREFIX_LENGTH:
+        # Shorter than the table's keys: search the whole token list
+        lo, hi = 0, len(tokens)
+    else:
+        lo, hi = index['prefixes'].get(prefix[:PREFIX_LENGTH], (0, 0))
+        if len(prefix) == PREFIX_LENGTH:
+            return range(lo, hi)
+    start = bisect_left(tokens, prefix, lo, hi)
+    end = start
+    while end < hi and tokens[end].startswith(prefix):
+        end += 1
+    return range(start, end)
+
+
+def search(index: Dict, query: str) -> List[int]:
+    """Doc numbers matching every query word (the last as a prefix), name matches first"""
+    words = normalize_tokens(query)
+    if not words:
+        return []
+
+    result = None
+    for i, word in enumerate(words):
+        if i == len(words) - 1:
+            token_ids = _prefix_token_ids(index, word)
+        else:
+            position = bisect_left(index['tokens'], word)
+            found = position < len(index['tokens']) and index['tokens'][position] == word
+            token_ids = [position] if found else []
+        docs = _docs_for(index, token_ids)
+        if result is None:
+            result = docs
+        else:
+            result = {doc: result[doc] | mask for doc, mask in docs.items() if doc in result}
+        if not result:
+            return []
+
+    return sorted(result, key=lambda doc: (not result[doc] & 1, doc))
+
+
+def write_search_index(cards: List, path: str = INDEX_FILE) -> Dict:
+    index = build_search_index(cards)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the card search index")
+    parser.add_argument('--cards', default=CARDS_FILE)
+    parser.add_argument('--output', default=INDEX_FILE)
+    parser.add_argument('--query', help="Search the freshly built index and print the matches")
+    args = parser.parse_args()
+
+    cards = load_cards(args.cards)
+    index = write_search_index(cards, args.output)
+    print(f"Indexed {len(cards)} cards, {len(index['tokens'])} tokens -> {args.output}")
+
+    if args.query:
+        for doc in search(index, args.query):
+            print(f"  {cards[doc].id}: {cards[doc].name}")
+
+if __name__ == "__main__":
+    main()